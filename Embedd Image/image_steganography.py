@@ -1,150 +1,170 @@
+import json
+import os
+import sys
+
 from PIL import Image, ImageFile
 import numpy as np
-import matplotlib.pyplot as plt
+
+# Make the shared stego package importable when run from this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stego import (
+    BLOCK_HEIGHT,
+    BLOCK_WIDTH,
+    CODEC_RAW,
+    DEFAULT_THRESHOLD,
+    HeaderError,
+    NUM_BITS_EDGE,
+    NUM_BITS_NON_EDGE,
+    PAYLOAD_IMAGE,
+    StegoEngine,
+    as_cover,
+    check_dimensions,
+    decode_payload,
+    decode_pixels,
+    encode_image,
+    encode_pixels,
+    quality_report,
+    show_histograms,
+)
 
 # Allow loading of truncated images
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-DEFAULT_THRESHOLD = 128  # Threshold for edge detection
-NUM_BITS_EDGE = 4  # Number of bits for edge blocks
-NUM_BITS_NON_EDGE = 1  # Number of bits for non-edge blocks
-BLOCK_WIDTH = 3  # Width of the block
-BLOCK_HEIGHT = 3  # Height of the block
+class EdgeDetectStego(StegoEngine):
 
-class EdgeDetectStego:
-    def __init__(self, threshold=DEFAULT_THRESHOLD, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT):
-        self.threshold = threshold
-        self.edge_bits = edge_bits
-        self.non_edge_bits = non_edge_bits
-        self.block_width = block_width
-        self.block_height = block_height
-
-    def embed_image(self, image_path, hidden_image_path):
+    def embed_image(self, image_path, hidden_image_path, header=False, compress=True, auto=False):
         """
         Embed a hidden image into the cover image using edge detection and block-based embedding.
+        With header=True the hidden image size is stored so extraction does not need it,
+        and with compress=True the hidden image is stored as PNG or lossless WebP if smaller.
+        auto=True implies a header and picks the threshold and bit split that fit the hidden
+        image with the least distortion, recording them in the cover for extraction.
+        Raises CapacityError if the hidden image does not fit into the cover.
         """
-        img = Image.open(image_path).convert("RGB")
-        hidden_img = Image.open(hidden_image_path).convert("RGB")
-
-        pixels = np.array(img)
-        hidden_pixels = np.array(hidden_img)
-
-        width, height = img.size
-        hidden_width, hidden_height = hidden_img.size
-        bit_index = 0
-        hidden_bits = ''.join(f'{pixel:08b}' for pixel in hidden_pixels.flatten())
-
-        for y in range(0, height, self.block_height):
-            for x in range(0, width, self.block_width):
-                if bit_index >= len(hidden_bits):
-                    break
-
-                num_bits = self.edge_bits if self.is_edge_block(pixels, x, y) else self.non_edge_bits
+        pixels = self.load_cover(image_path)
+        hidden_pixels = self.load_cover(hidden_image_path)
+        self.embed_image_array(pixels, hidden_pixels, header, compress, in_place=True, auto=auto)
 
-                for dy in range(self.block_height):
-                    for dx in range(self.block_width):
-                        if (x + dx < width) and (y + dy < height) and (bit_index < len(hidden_bits)):
-                            for channel in range(3):  # Process R, G, and B channels separately
-                                self.embed_bits(pixels, x + dx, y + dy, hidden_bits[bit_index:bit_index + num_bits], channel)
-                                bit_index += num_bits
-
-        encrypted_image = Image.fromarray(pixels)
+        with self.stage("convert"):
+            encrypted_image = Image.fromarray(pixels)
         return encrypted_image
 
-    def extract_image(self, encrypted_image_path, hidden_image_size):
+    def embed_image_array(self, pixels, hidden_pixels, header=False, compress=True, in_place=False, auto=False):
+        """
+        Embed an HxWx3 uint8 hidden image array into a cover array.
+        With in_place=True the cover array itself is modified, otherwise a copy is.
+        Returns the array holding the embedded image.
+        """
+        pixels = as_cover(pixels, in_place)
+
+        if header or auto:
+            hidden_height, hidden_width = hidden_pixels.shape[:2]
+            check_dimensions(hidden_width, hidden_height)
+            with self.stage("compression"):
+                codec, payload = encode_image(hidden_pixels) if compress else (CODEC_RAW, hidden_pixels)
+            if auto:
+                self.embed_auto(pixels, PAYLOAD_IMAGE, payload, hidden_width, hidden_height, codec)
+            else:
+                self.embed_with_header(pixels, self.compute_edge_map(pixels), PAYLOAD_IMAGE, payload, hidden_width, hidden_height, codec)
+        else:
+            self.embed_payload(pixels, self.compute_edge_map(pixels), hidden_pixels)
+        return pixels
+
+    def update_image_array(self, pixels, hidden_pixels, compress=False, in_place=False):
+        """
+        Replace the hidden image embedded with a header, rewriting only the slots that change.
+        compress defaults to False because an encoded image differs throughout after a small edit.
+        Returns the array and a dict with the slots and pixels changed.
+        """
+        pixels = as_cover(pixels, in_place)
+        hidden_height, hidden_width = hidden_pixels.shape[:2]
+        check_dimensions(hidden_width, hidden_height)
+        with self.stage("compression"):
+            codec, payload = encode_image(hidden_pixels) if compress else (CODEC_RAW, hidden_pixels)
+        return pixels, self.update_payload(pixels, PAYLOAD_IMAGE, payload, hidden_width, hidden_height, codec)
+
+    def embed_images_array(self, pixels, hidden_images, compress=True, in_place=False):
+        """
+        Embed several named hidden images as a container, so each can be extracted on its own.
+        Returns the array and the list of directory entries.
+        """
+        pixels = as_cover(pixels, in_place)
+        entries = []
+        for name, hidden_pixels in hidden_images.items():
+            hidden_height, hidden_width = hidden_pixels.shape[:2]
+            check_dimensions(hidden_width, hidden_height)
+            with self.stage("compression"):
+                codec, payload = encode_image(hidden_pixels) if compress else (CODEC_RAW, hidden_pixels)
+            entries.append({"name": name, "payload": payload, "payload_type": PAYLOAD_IMAGE, "codec": codec, "width": hidden_width, "height": hidden_height})
+        return pixels, self.embed_container(pixels, self.compute_edge_map(pixels), entries)
+
+    def embed_image_bytes(self, image_data, hidden_image_data, header=False, compress=True, format="PNG", auto=False, **save_options):
+        """
+        Embed a hidden image into a cover image, both given as encoded file bytes.
+        Returns the encrypted image encoded with the lossless format and save_options of save_pixels.
+        """
+        with self.stage("decode"):
+            pixels = decode_pixels(image_data)
+            hidden_pixels = decode_pixels(hidden_image_data)
+        self.embed_image_array(pixels, hidden_pixels, header, compress, in_place=True, auto=auto)
+        with self.stage("save"):
+            return encode_pixels(pixels, format, **save_options)
+
+    def extract_image(self, encrypted_image_path, hidden_image_size=None):
         """
         Extract the hidden image from the encrypted image.
+        Without hidden_image_size the size is read from the header written by embed_image(..., header=True).
         """
-        img = Image.open(encrypted_image_path).convert("RGB")
-        pixels = np.array(img)
-
-        width, height = img.size
-        hidden_width, hidden_height = hidden_image_size
-        hidden_bits = ""
-        bit_index = 0
-        total_bits = hidden_width * hidden_height * 8 * 3  # Each pixel has 3 channels (R, G, B)
-
-        for y in range(0, height, self.block_height):
-            for x in range(0, width, self.block_width):
-                if bit_index >= total_bits:
-                    break
-
-                num_bits = self.edge_bits if self.is_edge_block(pixels, x, y) else self.non_edge_bits
+        hidden_pixels = self.extract_image_array(self.load_cover(encrypted_image_path), hidden_image_size)
+        return Image.fromarray(hidden_pixels, "RGB")
 
-                for dy in range(self.block_height):
-                    for dx in range(self.block_width):
-                        if (x + dx < width) and (y + dy < height) and (bit_index < total_bits):
-                            for channel in range(3):  # Process R, G, and B channels separately
-                                bits = self.extract_bits(pixels, x + dx, y + dy, num_bits, channel)
-                                hidden_bits += bits
-                                bit_index += num_bits
-
-        hidden_pixel_values = [int(hidden_bits[i:i+8], 2) for i in range(0, total_bits, 8)]
-        hidden_image = np.array(hidden_pixel_values, dtype=np.uint8).reshape((hidden_height, hidden_width, 3))
-        return Image.fromarray(hidden_image, "RGB")
-
-    def is_edge_block(self, pixels, x, y):
+    def extract_image_array(self, pixels, hidden_image_size=None):
         """
-        Perform edge detection on the block of pixels.
+        Extract the hidden image from an encrypted HxWx3 uint8 array, which is not modified.
+        Returns the hidden image as an array; it may be read-only.
         """
-        if x + self.block_width >= pixels.shape[1] or y + self.block_height >= pixels.shape[0]:
-            return False
-
-        # Calculate gradients for edge detection within the valid block area
-        gx = pixels[y:y + self.block_height, x + 1:x + self.block_width + 1, 0] - pixels[y:y + self.block_height, x:x + self.block_width, 0]
-        gy = pixels[y + 1:y + self.block_height + 1, x:x + self.block_width, 0] - pixels[y:y + self.block_height, x:x + self.block_width, 0]
-        gradient_magnitude = np.sqrt(gx**2 + gy**2)
-
-        return np.any(gradient_magnitude > self.threshold)
-
-    def embed_bits(self, pixels, x, y, bits, channel):
+        if hidden_image_size is None:
+            header, payload = self.extract_with_header(pixels, PAYLOAD_IMAGE)
+            hidden_width, hidden_height = header["width"], header["height"]
+            with self.stage("compression"):
+                hidden_pixels = np.frombuffer(decode_payload(header["codec"], payload), dtype=np.uint8)
+        else:
+            hidden_width, hidden_height = hidden_image_size
+            total_bytes = hidden_width * hidden_height * 3  # Each pixel has 3 channels (R, G, B)
+            hidden_pixels = self.extract_payload(pixels, self.compute_edge_map(pixels), total_bytes)
+        return hidden_pixels.reshape((hidden_height, hidden_width, 3))
+
+    def extract_image_entry(self, pixels, name):
         """
-        Embed bits into the pixel value.
+        Extract one named hidden image from a container, reading only the slots it occupies.
+        Raises KeyError for an unknown name and HeaderError if the entry is not an image.
         """
-        current_value = pixels[y, x, channel]
-        bits_value = int(bits, 2)
-        mask = (1 << len(bits)) - 1
-        new_value = (current_value & ~mask) | bits_value
-        pixels[y, x, channel] = new_value
-
-    def extract_bits(self, pixels, x, y, num_bits, channel):
+        entry, payload = self.extract_entry(pixels, name)
+        if entry["payload_type"] != PAYLOAD_IMAGE:
+            raise HeaderError(f"Container entry {name!r} has type {entry['payload_type']}, expected an image")
+        with self.stage("compression"):
+            hidden_pixels = np.frombuffer(decode_payload(entry["codec"], payload), dtype=np.uint8)
+        return hidden_pixels.reshape((entry["height"], entry["width"], 3))
+
+    def extract_image_bytes(self, image_data, hidden_image_size=None, format="PNG", **save_options):
         """
-        Extract bits from the pixel value.
+        Extract the hidden image from encrypted image file bytes.
+        Returns the hidden image encoded with the given format and save_options of save_pixels.
         """
-        value = pixels[y, x, channel] & ((1 << num_bits) - 1)
-        return f"{value:0{num_bits}b}"
+        with self.stage("decode"):
+            pixels = decode_pixels(image_data)
+        hidden_pixels = self.extract_image_array(pixels, hidden_image_size)
+        with self.stage("save"):
+            return encode_pixels(hidden_pixels, format, **save_options)
 
 def plot_histograms(original_image_path, encrypted_image_path):
     """
-    Plot histograms for the original and encrypted images in grayscale.
+    Plot the channel histograms of the original and encrypted images; paths or arrays.
+    Prints their quality metrics first. matplotlib is only imported by the viewer.
     """
-    # Load the original and encrypted images and convert them to grayscale
-    original_image = Image.open(original_image_path).convert("L")
-    encrypted_image = Image.open(encrypted_image_path).convert("L")
-
-    # Convert images to numpy arrays
-    original_pixels = np.array(original_image).flatten()
-    encrypted_pixels = np.array(encrypted_image).flatten()
-
-    # Plot histograms
-    plt.figure(figsize=(12, 6))
-
-    # Histogram of the original image
-    plt.subplot(1, 2, 1)
-    plt.hist(original_pixels, bins=256, range=(0, 255), color='blue', alpha=0.7)
-    plt.title("Histogram of Original Image (Grayscale)")
-    plt.xlabel("Pixel Intensity")
-    plt.ylabel("Frequency")
-
-    # Histogram of the encrypted image
-    plt.subplot(1, 2, 2)
-    plt.hist(encrypted_pixels, bins=256, range=(0, 255), color='blue', alpha=0.7)
-    plt.title("Histogram of Encrypted Image (Grayscale)")
-    plt.xlabel("Pixel Intensity")
-    plt.ylabel("Frequency")
-
-    plt.tight_layout()
-    plt.show()
+    print("Quality:", json.dumps(quality_report(original_image_path, encrypted_image_path)))
+    show_histograms(original_image_path, encrypted_image_path, "Encrypted Image")
 
 def main():
     image_path = '/content/new-large.png'  # Path to your large image file
@@ -155,13 +175,13 @@ def main():
     # Embed the hidden image into the cover image
     print("Embedding hidden image...")
     encrypted_image = stego.embed_image(image_path, hidden_image_path)
-    encrypted_image.save('encrypted_image.png')
+    stego.save_image(encrypted_image, 'encrypted_image.png')
     print("Hidden image embedded and saved as 'encrypted_image.png'")
 
     # Extract the hidden image from the encrypted image
     print("Extracting hidden image...")
     extracted_image = stego.extract_image('encrypted_image.png', Image.open(hidden_image_path).size)
-    extracted_image.save('extracted_image.png')
+    stego.save_image(extracted_image, 'extracted_image.png')
     print("Hidden image extracted and saved as 'extracted_image.png'")
 
     # Plot histograms of the original and encrypted images
@@ -2,8 +2,14 @@ from tkinter import *
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
 import threading
+import queue
 import os
 from image_steganography import EdgeDetectStego  # Assuming you saved the image steganography code in this file
+from stego import CancelToken, Cancelled
+
+POLL_MS = 50  # How often the Tk thread applies updates posted by background threads
+PREVIEW_SIZE = (160, 120)
+STAGE_LABELS = {"edge_detection": "Detecting edges", "embed": "Embedding", "extract": "Extracting"}
 
 
 class RoundedButton(Canvas):
@@ -47,10 +53,12 @@ class ImageSteganographyGUI:
         self.root.title("Image Steganography")
         self.root.geometry("900x600")
         self.root.configure(bg="#2c3e50")
-        self.stego = EdgeDetectStego()
+        self.events = queue.Queue()  # Callbacks posted by background threads for the Tk thread
+        self.jobs = {}  # Running job name -> CancelToken
 
         self.style_tabs()
         self.create_widgets()
+        self.root.after(POLL_MS, self.poll_events)
 
     def style_tabs(self):
         style = ttk.Style()
@@ -95,6 +103,13 @@ class ImageSteganographyGUI:
         self.encode_cover_label = Label(frame, text="No cover image selected", bg="#34495e", fg="#ecf0f1", font=("Helvetica", 14))
         self.encode_cover_label.pack(pady=10)
 
+        previews = Frame(frame, bg="#34495e")
+        previews.pack()
+        self.cover_preview = Label(previews, bg="#34495e")
+        self.cover_preview.pack(side=LEFT, padx=5)
+        self.hidden_preview = Label(previews, bg="#34495e")
+        self.hidden_preview.pack(side=LEFT, padx=5)
+
         RoundedButton(frame, text="Select Cover Image",width=400, command=self.select_cover_image).pack(pady=10)
 
         self.encode_hidden_label = Label(frame, text="No hidden image selected", bg="#34495e", fg="#ecf0f1", font=("Helvetica", 14))
@@ -105,7 +120,13 @@ class ImageSteganographyGUI:
         self.encode_status_label = Label(frame, text="", bg="#34495e", fg="#ecf0f1", font=("Helvetica", 14))
         self.encode_status_label.pack(pady=10)
 
-        RoundedButton(frame, text="ENCODE", command=self.start_encoding, bg="#2ecc71").pack(pady=20)
+        self.encode_progress = ttk.Progressbar(frame, length=400, maximum=100)
+        self.encode_progress.pack(pady=5)
+
+        buttons = Frame(frame, bg="#34495e")
+        buttons.pack(pady=20)
+        RoundedButton(buttons, text="ENCODE", command=self.start_encoding, bg="#2ecc71").pack(side=LEFT)
+        RoundedButton(buttons, text="CANCEL", command=lambda: self.cancel_job("encode"), bg="#e74c3c").pack(side=LEFT)
 
     def create_decode_tab(self):
         frame = Frame(self.decode_tab, bg="#34495e")
@@ -116,22 +137,32 @@ class ImageSteganographyGUI:
         self.decode_file_label = Label(frame, text="No image selected", bg="#34495e", fg="#ecf0f1", font=("Helvetica", 14))
         self.decode_file_label.pack(pady=10)
 
+        self.decode_preview = Label(frame, bg="#34495e")
+        self.decode_preview.pack()
+
         RoundedButton(frame, text="Select Encrypted Image", width=400, command=self.select_decode_file, bg="#e74c3c").pack(pady=10)
 
-        Label(frame, text="Hidden Image Size (Width x Height):", font=("Helvetica", 14), bg="#34495e", fg="#ecf0f1").pack(pady=10)
+        Label(frame, text="Hidden Image Size (Width x Height, blank to read header):", font=("Helvetica", 14), bg="#34495e", fg="#ecf0f1").pack(pady=10)
         self.decode_size_entry = Entry(frame, width=20, font=("Helvetica", 14))
         self.decode_size_entry.pack(pady=10)
 
         self.decode_status_label = Label(frame, text="", bg="#34495e", fg="#ecf0f1", font=("Helvetica", 14))
         self.decode_status_label.pack(pady=10)
 
-        RoundedButton(frame, text="DECODE", command=self.start_decoding, bg="#2ecc71").pack(pady=10)
+        self.decode_progress = ttk.Progressbar(frame, length=400, maximum=100)
+        self.decode_progress.pack(pady=5)
+
+        buttons = Frame(frame, bg="#34495e")
+        buttons.pack(pady=10)
+        RoundedButton(buttons, text="DECODE", command=self.start_decoding, bg="#2ecc71").pack(side=LEFT)
+        RoundedButton(buttons, text="CANCEL", command=lambda: self.cancel_job("decode"), bg="#e74c3c").pack(side=LEFT)
 
     def select_cover_image(self):
         file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.png *.jpg *.jpeg")])
         if file_path:
             self.cover_image_path = file_path
             self.encode_cover_label.config(text=f"Selected: {os.path.basename(file_path)}")
+            self.load_preview(file_path, self.cover_preview)
         else:
             self.encode_cover_label.config(text="No cover image selected")
 
@@ -140,6 +171,7 @@ class ImageSteganographyGUI:
         if file_path:
             self.hidden_image_path = file_path
             self.encode_hidden_label.config(text=f"Selected: {os.path.basename(file_path)}")
+            self.load_preview(file_path, self.hidden_preview)
         else:
             self.encode_hidden_label.config(text="No hidden image selected")
 
@@ -148,6 +180,7 @@ class ImageSteganographyGUI:
         if file_path:
             self.encrypted_image_path = file_path
             self.decode_file_label.config(text=f"Selected: {os.path.basename(file_path)}")
+            self.load_preview(file_path, self.decode_preview)
         else:
             self.decode_file_label.config(text="No image selected")
 
@@ -156,21 +189,19 @@ class ImageSteganographyGUI:
             messagebox.showerror("Error", "Cover image or hidden image is not selected!")
             return
 
-        self.encode_status_label.config(text="Encoding in progress...")
-        threading.Thread(target=self.encode_image).start()
+        cover_path, hidden_path = self.cover_image_path, self.hidden_image_path
+        if self.start_job("encode", self.encode_status_label, self.encode_progress, lambda stego: self.encode_image(stego, cover_path, hidden_path)):
+            self.encode_status_label.config(text="Encoding in progress...")
 
-    def encode_image(self):
-        try:
-            save_folder = "assets"
-            os.makedirs(save_folder, exist_ok=True)
-            save_path = os.path.join(save_folder, "encrypted_image.png")
+    def encode_image(self, stego, cover_path, hidden_path):
+        save_folder = "assets"
+        os.makedirs(save_folder, exist_ok=True)
+        save_path = os.path.join(save_folder, "encrypted_image.png")
 
-            encrypted_image = self.stego.embed_image(self.cover_image_path, self.hidden_image_path)
-            encrypted_image.save(save_path)
+        encrypted_image = stego.embed_image(cover_path, hidden_path, header=True)
+        stego.save_image(encrypted_image, save_path)
 
-            self.encode_status_label.config(text=f"Encoding successful! Saved to: {save_path}")
-        except Exception as e:
-            self.encode_status_label.config(text=f"Error: {e}")
+        return f"Encoding successful! Saved to: {save_path}"
 
     def start_decoding(self):
         if not hasattr(self, 'encrypted_image_path'):
@@ -178,26 +209,100 @@ class ImageSteganographyGUI:
             return
 
         size = self.decode_size_entry.get().strip()
+        hidden_size = None
+        if size:
+            try:
+                width, height = map(int, size.split('x'))
+                hidden_size = (width, height)
+            except ValueError:
+                messagebox.showerror("Error", "Invalid image size! Format: Width x Height")
+                return
+
+        file_path = self.encrypted_image_path
+        if self.start_job("decode", self.decode_status_label, self.decode_progress, lambda stego: self.decode_image(stego, file_path, hidden_size)):
+            self.decode_status_label.config(text="Decoding in progress...")
+
+    def decode_image(self, stego, file_path, hidden_size):
+        hidden_image = stego.extract_image(file_path, hidden_size)
+        save_folder = "assets"
+        os.makedirs(save_folder, exist_ok=True)
+        save_path = os.path.join(save_folder, "extracted_image.png")
+        stego.save_image(hidden_image, save_path)
+
+        return f"Decoding successful! Saved to: {save_path}"
+
+    def start_job(self, name, status_label, progress_bar, work):
+        """
+        Run work(stego) on a background thread with an engine that reports progress and can be cancelled.
+        The status text work returns is shown when it finishes; returns False if the job is already running.
+        """
+        if name in self.jobs:
+            messagebox.showerror("Error", "This job is still running, cancel it first!")
+            return False
+
+        token = CancelToken()
+        self.jobs[name] = token
+        progress_bar["value"] = 0
+        progress = lambda stage, done, total: self.post(self.show_progress, status_label, progress_bar, stage, done, total)
+        stego = EdgeDetectStego(progress=progress, cancel=token)
+        threading.Thread(target=self.run_job, args=(name, stego, status_label, work), daemon=True).start()
+        return True
+
+    def run_job(self, name, stego, status_label, work):
         try:
-            width, height = map(int, size.split('x'))
-        except ValueError:
-            messagebox.showerror("Error", "Invalid image size! Format: Width x Height")
-            return
+            text = work(stego)
+        except Cancelled:
+            text = "Cancelled."
+        except Exception as e:
+            text = f"Error: {e}"
+        self.post(self.finish_job, name, status_label, text)
 
-        self.decode_status_label.config(text="Decoding in progress...")
-        threading.Thread(target=self.decode_image, args=((width, height),)).start()
+    def cancel_job(self, name):
+        token = self.jobs.get(name)
+        if token is not None:
+            token.cancel()
 
-    def decode_image(self, hidden_size):
-        try:
-            hidden_image = self.stego.extract_image(self.encrypted_image_path, hidden_size)
-            save_folder = "assets"
-            os.makedirs(save_folder, exist_ok=True)
-            save_path = os.path.join(save_folder, "extracted_image.png")
-            hidden_image.save(save_path)
+    def finish_job(self, name, status_label, text):
+        self.jobs.pop(name, None)
+        status_label.config(text=text)
 
-            self.decode_status_label.config(text=f"Decoding successful! Saved to: {save_path}")
-        except Exception as e:
-            self.decode_status_label.config(text=f"Error: {e}")
+    def show_progress(self, status_label, progress_bar, stage, done, total):
+        percent = 100 * done / total if total else 100
+        progress_bar["value"] = percent
+        status_label.config(text=f"{STAGE_LABELS.get(stage, stage)}... {percent:.0f}%")
+
+    def load_preview(self, file_path, label):
+        threading.Thread(target=self.read_preview, args=(file_path, label), daemon=True).start()
+
+    def read_preview(self, file_path, label):
+        try:
+            with Image.open(file_path) as image:
+                image.draft("RGB", PREVIEW_SIZE)  # JPEGs decode straight at a reduced scale
+                image.thumbnail(PREVIEW_SIZE)
+                preview = image.convert("RGB")
+        except OSError:
+            return
+        self.post(self.show_preview, label, preview)
+
+    def show_preview(self, label, image):
+        photo = ImageTk.PhotoImage(image)
+        label.config(image=photo)
+        label.image = photo  # Keep a reference so Tk does not drop the image
+
+    def post(self, callback, *args):
+        """
+        Queue callback(*args) to run on the Tk thread; safe to call from any thread.
+        """
+        self.events.put((callback, args))
+
+    def poll_events(self):
+        while True:
+            try:
+                callback, args = self.events.get_nowait()
+            except queue.Empty:
+                break
+            callback(*args)
+        self.root.after(POLL_MS, self.poll_events)
 
 
 if __name__ == "__main__":
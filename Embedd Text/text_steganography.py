@@ -1,132 +1,199 @@
-from PIL import Image
-import numpy as np
-import matplotlib.pyplot as plt
-
-DEFAULT_THRESHOLD = 128  # Threshold for edge detection
-NUM_BITS = 8  # Bit depth for each pixel channel
+import json
+import os
+import sys
 
-class EdgeDetectStego:
-    def __init__(self, threshold=DEFAULT_THRESHOLD, edge_bits=4, non_edge_bits=1, block_width=3, block_height=3):
-        self.threshold = threshold
-        self.edge_bits = edge_bits
-        self.non_edge_bits = non_edge_bits
-        self.block_width = block_width
-        self.block_height = block_height
+from PIL import Image
 
-    def embed_message(self, image_path, message):
+# Make the shared stego package importable when run from this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stego import (
+    CODEC_RAW,
+    HeaderError,
+    PAYLOAD_TEXT,
+    StegoEngine,
+    as_cover,
+    decode_payload,
+    decode_pixels,
+    encode_bytes,
+    encode_pixels,
+    quality_report,
+    show_histograms,
+)
+
+class EdgeDetectStego(StegoEngine):
+
+    def embed_message(self, image_path, message, header=False, compress=True, auto=False):
         """
         Embeds a message into an RGB image based on edge detection.
 
         :param image_path: Path to the input image
         :param message: String message to embed
+        :param header: Prefix the message with a header so it can be extracted without its length;
+            the message is then stored as UTF-8
+        :param compress: With a header, store the message with whichever of zlib, lzma or bz2 is smallest
+        :param auto: Embed with a header using the threshold and bit split that fit the message
+            with the least distortion, recorded in the image for extraction
         :return: PIL Image object with embedded message
+        :raises CapacityError: If the message does not fit into the image
         """
-        # Convert the message to a bit string
-        message_bits = ''.join(f'{ord(c):08b}' for c in message)
-        img = Image.open(image_path).convert("RGB")  # Load and convert to RGB
-        pixels = np.array(img)
-
-        width, height = img.size
-        bit_index = 0
-
-        for y in range(0, height, self.block_height):
-            for x in range(0, width, self.block_width):
-                num_bits = self.edge_bits if self.is_edge_block(pixels, x, y) else self.non_edge_bits
-
-                for dy in range(self.block_height):
-                    for dx in range(self.block_width):
-                        # Ensure that we do not go out of bounds
-                        if (x + dx < width) and (y + dy < height):
-                            if bit_index < len(message_bits) and num_bits > 0:  # Only embed bits if there are bits to embed
-                                for channel in range(3):  # Loop over R, G, B channels
-                                    if bit_index < len(message_bits):
-                                        self.embed_bits(pixels, x + dx, y + dy, message_bits[bit_index:bit_index + num_bits], channel)
-                                        bit_index += num_bits
-
-        encrypted_image = Image.fromarray(pixels)
+        pixels = self.load_cover(image_path)
+        self.embed_message_array(pixels, message, header, compress, in_place=True, auto=auto)
+
+        with self.stage("convert"):
+            encrypted_image = Image.fromarray(pixels)
         return encrypted_image
 
-    def extract_message(self, image_path, message_length):
+    def embed_message_array(self, pixels, message, header=False, compress=True, in_place=False, auto=False):
+        """
+        Embeds a message into an HxWx3 uint8 array.
+
+        :param pixels: Cover pixels
+        :param message: String message to embed
+        :param header: See ``embed_message``
+        :param compress: See ``embed_message``
+        :param in_place: Modify ``pixels`` itself instead of a copy
+        :param auto: See ``embed_message``
+        :return: Array with the embedded message
+        :raises CapacityError: If the message does not fit into the image
+        """
+        pixels = as_cover(pixels, in_place)
+
+        if header or auto:
+            payload = message.encode("utf-8")
+            with self.stage("compression"):
+                codec, payload = encode_bytes(payload) if compress else (CODEC_RAW, payload)
+            if auto:
+                self.embed_auto(pixels, PAYLOAD_TEXT, payload, codec=codec)
+            else:
+                self.embed_with_header(pixels, self.compute_edge_map(pixels), PAYLOAD_TEXT, payload, codec=codec)
+        else:
+            self.embed_payload(pixels, self.compute_edge_map(pixels), message.encode("latin-1"))
+        return pixels
+
+    def update_message_array(self, pixels, message, compress=False, in_place=False):
+        """
+        Replace the message embedded with a header, rewriting only the slots that change.
+
+        :param pixels: Encrypted image pixels
+        :param message: New string message
+        :param compress: Compress the new message; off by default because a compressed
+            message differs throughout after a small edit
+        :param in_place: Modify ``pixels`` itself instead of a copy
+        :return: Tuple of (array with the new message, dict of slots and pixels changed)
+        :raises CapacityError: If the message does not fit into the image
+        """
+        pixels = as_cover(pixels, in_place)
+        payload = message.encode("utf-8")
+        with self.stage("compression"):
+            codec, payload = encode_bytes(payload) if compress else (CODEC_RAW, payload)
+        return pixels, self.update_payload(pixels, PAYLOAD_TEXT, payload, codec=codec)
+
+    def embed_messages_array(self, pixels, messages, compress=True, in_place=False):
+        """
+        Embeds several named messages as a container, so each can be extracted on its own.
+
+        :param pixels: Cover pixels
+        :param messages: Dict of entry name to string message
+        :param compress: Compress each message that shrinks
+        :param in_place: Modify ``pixels`` itself instead of a copy
+        :return: Tuple of (array with the embedded messages, list of directory entries)
+        :raises CapacityError: If the messages do not fit into the image
+        """
+        pixels = as_cover(pixels, in_place)
+        entries = []
+        for name, message in messages.items():
+            payload = message.encode("utf-8")
+            with self.stage("compression"):
+                codec, payload = encode_bytes(payload) if compress else (CODEC_RAW, payload)
+            entries.append({"name": name, "payload": payload, "payload_type": PAYLOAD_TEXT, "codec": codec})
+        return pixels, self.embed_container(pixels, self.compute_edge_map(pixels), entries)
+
+    def embed_message_bytes(self, image_data, message, header=False, compress=True, format="PNG", auto=False, **save_options):
+        """
+        Embeds a message into an encoded image held in memory.
+
+        :param image_data: Bytes of the cover image file
+        :param message: String message to embed
+        :param header: See ``embed_message``
+        :param compress: See ``embed_message``
+        :param format: Lossless format of the returned image
+        :param auto: See ``embed_message``
+        :param save_options: Encoder options such as ``compress_level`` and ``strategy``, see ``save_pixels``
+        :return: Bytes of the encrypted image file
+        :raises CapacityError: If the message does not fit into the image
+        """
+        with self.stage("decode"):
+            pixels = decode_pixels(image_data)
+        self.embed_message_array(pixels, message, header, compress, in_place=True, auto=auto)
+        with self.stage("save"):
+            return encode_pixels(pixels, format, **save_options)
+
+    def extract_message(self, image_path, message_length=None):
         """
         Extracts an embedded message from an RGB image.
 
         :param image_path: Path to the encrypted image
-        :param message_length: Expected length of the original message in characters
+        :param message_length: Expected length of the original message in characters, or None
+            to read it from the header written by ``embed_message(..., header=True)``
         :return: Extracted message as a string
         """
-        img = Image.open(image_path).convert("RGB")
-        pixels = np.array(img)
-
-        width, height = img.size
-        message_bits = ""
-        bit_index = 0
-        total_bits = message_length * 8
-
-        for y in range(0, height, self.block_height):
-            for x in range(0, width, self.block_width):
-                num_bits = self.edge_bits if self.is_edge_block(pixels, x, y) else self.non_edge_bits
-
-                for dy in range(self.block_height):
-                    for dx in range(self.block_width):
-                        # Ensure that we do not go out of bounds
-                        if (x + dx < width) and (y + dy < height):
-                            if bit_index < total_bits:
-                                for channel in range(3):  # Loop over R, G, B channels
-                                    if bit_index < total_bits:
-                                        bits = self.extract_bits(pixels, x + dx, y + dy, num_bits, channel)
-                                        message_bits += bits
-                                        bit_index += num_bits
-
-        message = ''.join(chr(int(message_bits[i:i+8], 2)) for i in range(0, total_bits, 8))
-        return message
-
-    def is_edge_block(self, pixels, x, y):
-        # Ensure we do not go out of bounds
-        if x + self.block_width + 1 > pixels.shape[1] or y + self.block_height + 1 > pixels.shape[0]:
-            return False  # Treat blocks at the edges as non-edge blocks
-
-        # Calculate gradient magnitude for edge detection on the R channel
-        gx = pixels[y:y + self.block_height, x + 1:x + self.block_width + 1, 0] - pixels[y:y + self.block_height, x:x + self.block_width, 0]
-        gy = pixels[y + 1:y + self.block_height + 1, x:x + self.block_width, 0] - pixels[y:y + self.block_height, x:x + self.block_width, 0]
-        gradient_magnitude = np.sqrt(gx**2 + gy**2)
-
-        return np.any(gradient_magnitude > self.threshold)
-
-    def embed_bits(self, pixels, x, y, bits, channel):
-        current_value = pixels[y, x, channel]
-        bits_value = int(bits, 2)
-        mask = (1 << len(bits)) - 1
-        new_value = (current_value & ~mask) | bits_value
-        pixels[y, x, channel] = new_value
-
-    def extract_bits(self, pixels, x, y, num_bits, channel):
-        value = pixels[y, x, channel] & ((1 << num_bits) - 1)
-        return f"{value:0{num_bits}b}"
-
-def plot_histograms(original_image_path, encrypted_image_path):
-    original_image = Image.open(original_image_path).convert("L")
-    encrypted_image = Image.open(encrypted_image_path).convert("L")
+        return self.extract_message_array(self.load_cover(image_path), message_length)
 
-    original_pixels = np.array(original_image).flatten()
-    encrypted_pixels = np.array(encrypted_image).flatten()
+    def extract_message_array(self, pixels, message_length=None):
+        """
+        Extracts an embedded message from an HxWx3 uint8 array; the array is not modified.
 
-    plt.figure(figsize=(12, 6))
+        :param pixels: Encrypted image pixels
+        :param message_length: See ``extract_message``
+        :return: Extracted message as a string
+        """
+        if message_length is None:
+            header, payload = self.extract_with_header(pixels, PAYLOAD_TEXT)
+            encoding = "latin-1" if header["version"] == 1 else "utf-8"
+            with self.stage("compression"):
+                payload = decode_payload(header["codec"], payload)
+            return payload.decode(encoding)
+        else:
+            payload = self.extract_payload(pixels, self.compute_edge_map(pixels), message_length)
+        return payload.tobytes().decode("latin-1")
+
+    def extract_message_entry(self, pixels, name):
+        """
+        Extracts one named message from a container, reading only the slots it occupies.
 
-    plt.subplot(1, 2, 1)
-    plt.hist(original_pixels, bins=256, range=(0, 255), color='blue', alpha=0.7)
-    plt.title("Histogram of Original Image (Grayscale)")
-    plt.xlabel("Pixel Intensity")
-    plt.ylabel("Frequency")
+        :param pixels: Encrypted image pixels
+        :param name: Entry name given to ``embed_messages_array``
+        :return: Extracted message as a string
+        :raises KeyError: If the container has no entry called ``name``
+        :raises HeaderError: If the entry is not text or fails its checksum
+        """
+        entry, payload = self.extract_entry(pixels, name)
+        if entry["payload_type"] != PAYLOAD_TEXT:
+            raise HeaderError(f"Container entry {name!r} has type {entry['payload_type']}, expected text")
+        with self.stage("compression"):
+            payload = decode_payload(entry["codec"], payload)
+        return payload.decode("utf-8")
+
+    def extract_message_bytes(self, image_data, message_length=None):
+        """
+        Extracts an embedded message from an encoded image held in memory.
 
-    # Histogram of the encrypted image
-    plt.subplot(1, 2, 2)
-    plt.hist(encrypted_pixels, bins=256, range=(0, 255), color='blue', alpha=0.7)
-    plt.title("Histogram of Encrypted Image (Grayscale)")
-    plt.xlabel("Pixel Intensity")
-    plt.ylabel("Frequency")
+        :param image_data: Bytes of the encrypted image file
+        :param message_length: See ``extract_message``
+        :return: Extracted message as a string
+        """
+        with self.stage("decode"):
+            pixels = decode_pixels(image_data)
+        return self.extract_message_array(pixels, message_length)
 
-    plt.tight_layout()
-    plt.show()
+def plot_histograms(original_image_path, encrypted_image_path):
+    """
+    Plot the channel histograms of the original and encrypted images; paths or arrays.
+    Prints their quality metrics first. matplotlib is only imported by the viewer.
+    """
+    print("Quality:", json.dumps(quality_report(original_image_path, encrypted_image_path)))
+    show_histograms(original_image_path, encrypted_image_path, "Encrypted Image")
 
 def main():
     image_path = '/content/new-small.png'  # Path to your input RGB image
@@ -137,7 +204,7 @@ def main():
     print("Embedding message...")
     encrypted_image = stego.embed_message(image_path, message)
     encrypted_image_path = 'encrypted_image.png'
-    encrypted_image.save(encrypted_image_path)
+    stego.save_image(encrypted_image, encrypted_image_path)
     print("Message embedded and saved as 'encrypted_image.png'")
 
     print("Extracting message...")
@@ -0,0 +1,248 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Make the shared stego package and both stego classes importable when run from this folder
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Embedd Text"))
+sys.path.insert(0, os.path.join(ROOT, "Embedd Image"))
+
+from stego import BLOCK_HEIGHT, BLOCK_WIDTH, NUM_BITS_EDGE, capacity_report, load_pixels
+import image_steganography
+import text_steganography
+
+ASSET = os.path.join(ROOT, "Embedd Image", "assets", "1mb.png")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SIZES = (256, 1024, 2048, 4096, 8192)  # Side of the square synthetic covers
+QUICK_SIZES = (256, 1024)
+EDGE_DENSITIES = (0.1, 0.5, 0.9)  # Fraction of noisy tiles in a synthetic cover
+PAYLOAD_FRACTIONS = (0.1, 0.5, 0.9)  # Payload size relative to the cover capacity
+BLOCK_SIZES = ((3, 3), (4, 4), (8, 8), (16, 4))
+EDGE_BITS = (2, 3, 4)
+SWEEP_SIZE = 1024  # Cover side for the payload, block and edge bit sweeps
+DEFAULT_DENSITY = 0.5
+DEFAULT_FRACTION = 0.5
+TILE = 8  # Synthetic covers are flat or noisy in TILE x TILE squares
+THRESHOLD = 10  # The default threshold of 128 never marks edges with the legacy gradient check
+REGRESSION_THRESHOLD = 0.10  # Relative slowdown or memory growth reported as a regression
+THROUGHPUT_METRICS = ("embed_mb_s", "extract_mb_s", "embed_mpix_s", "extract_mpix_s")
+CLASSES = {"text": text_steganography.EdgeDetectStego, "image": image_steganography.EdgeDetectStego}
+
+
+def synthetic_cover(size, edge_density, seed=0):
+    """
+    Generate a square cover in which roughly ``edge_density`` of the tiles are noise.
+
+    Noisy tiles have strong gradients and classify as edges, flat tiles share one grey
+    level and classify as non-edges; the measured edge fraction is reported per case.
+
+    :return: size x size x 3 uint8 array
+    """
+    rng = np.random.default_rng(seed)
+    tiles = -(-size // TILE)
+    noisy = rng.random((tiles, tiles)) < edge_density
+    mask = np.repeat(np.repeat(noisy, TILE, axis=0), TILE, axis=1)[:size, :size]
+    pixels = np.full((size, size, 3), 128, dtype=np.uint8)
+    pixels[mask] = rng.integers(0, 256, (int(mask.sum()), 3), dtype=np.uint8)
+    return pixels
+
+
+def build_cases(sizes, include_asset=True):
+    """
+    One-factor-at-a-time sweep around the default configuration, for both stego classes.
+
+    :return: List of case dicts
+    """
+    default = {"cover": SWEEP_SIZE, "density": DEFAULT_DENSITY, "fraction": DEFAULT_FRACTION, "block": (BLOCK_WIDTH, BLOCK_HEIGHT), "edge_bits": NUM_BITS_EDGE}
+    variants = [{"cover": size, "density": density} for size in sizes for density in EDGE_DENSITIES]
+    variants += [{"fraction": fraction} for fraction in PAYLOAD_FRACTIONS]
+    variants += [{"block": block} for block in BLOCK_SIZES]
+    variants += [{"edge_bits": edge_bits} for edge_bits in EDGE_BITS]
+    if include_asset:
+        variants.append({"cover": "1mb.png", "density": None})
+
+    cases = []
+    seen = set()
+    for variant in variants:
+        for kind in CLASSES:
+            case = dict(default, kind=kind, **variant)
+            case["name"] = case_name(case)
+            if case["name"] not in seen:
+                seen.add(case["name"])
+                cases.append(case)
+    return cases
+
+
+def case_name(case):
+    density = "" if case["density"] is None else f"/d{case['density']}"
+    return f"{case['kind']}/{case['cover']}{density}/p{case['fraction']}/b{case['block'][0]}x{case['block'][1]}/e{case['edge_bits']}"
+
+
+def run_case(case, repeats):
+    """
+    Time embedding and extraction for one case; meant to run in a fresh process.
+
+    :return: Result dict with the case fields, throughput and peak RSS
+    """
+    if case["cover"] == "1mb.png":
+        cover = load_pixels(ASSET)
+    else:
+        cover = synthetic_cover(case["cover"], case["density"])
+    height, width = cover.shape[:2]
+
+    block_width, block_height = case["block"]
+    stego = CLASSES[case["kind"]](THRESHOLD, edge_bits=case["edge_bits"], block_width=block_width, block_height=block_height)
+    edge_map = stego.compute_edge_map(cover)
+    report = capacity_report(edge_map, height, width, stego.edge_bits, stego.non_edge_bits, block_width, block_height)
+    budget = int(report["total_bytes"] * case["fraction"])
+
+    rng = np.random.default_rng(1)
+    if case["kind"] == "text":
+        payload = rng.integers(32, 127, budget, dtype=np.uint8).tobytes().decode("ascii")
+        payload_bytes = len(payload)
+        embed = lambda pixels: stego.embed_message_array(pixels, payload, in_place=True)
+        extract = lambda pixels: stego.extract_message_array(pixels, payload_bytes)
+    else:
+        side = max(math.isqrt(budget // 3), 1)
+        payload = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+        payload_bytes = payload.nbytes
+        embed = lambda pixels: stego.embed_image_array(pixels, payload, in_place=True)
+        extract = lambda pixels: stego.extract_image_array(pixels, (side, side))
+
+    embed_seconds = extract_seconds = math.inf
+    for _ in range(repeats):
+        pixels = cover.copy()
+        start = time.perf_counter()
+        embed(pixels)
+        embed_seconds = min(embed_seconds, time.perf_counter() - start)
+        start = time.perf_counter()
+        extract(pixels)
+        extract_seconds = min(extract_seconds, time.perf_counter() - start)
+
+    megapixels = height * width / 1e6
+    megabytes = payload_bytes / 1e6
+    result = {key: value for key, value in case.items() if key != "block"}
+    result.update(
+        threshold=THRESHOLD,
+        block_width=block_width,
+        block_height=block_height,
+        width=width,
+        height=height,
+        edge_fraction=round(float(edge_map.mean()), 4) if edge_map.size else 0.0,
+        payload_bytes=payload_bytes,
+        embed_seconds=round(embed_seconds, 6),
+        extract_seconds=round(extract_seconds, 6),
+        embed_mb_s=round(megabytes / embed_seconds, 3),
+        extract_mb_s=round(megabytes / extract_seconds, 3),
+        embed_mpix_s=round(megapixels / embed_seconds, 3),
+        extract_mpix_s=round(megapixels / extract_seconds, 3),
+        peak_rss_mb=round(peak_rss_mb(), 1),
+    )
+    return result
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3  # Bytes on macOS, kB elsewhere
+
+
+def run_cases(cases, repeats):
+    """
+    Run every case in its own spawned process so that peak RSS is per case.
+
+    :return: Iterator of result dicts in case order
+    """
+    context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            yield pool.submit(run_case, case, repeats).result()
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare results against a baseline run case by case.
+
+    Throughput that drops by more than ``threshold`` or peak RSS that grows by more
+    than ``threshold`` counts as a regression; cases missing from either run are skipped.
+
+    :return: List of (case name, metric, baseline value, new value) regressions
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if result[metric] < before[metric] * (1 - threshold):
+                regressions.append((result["name"], metric, before[metric], result[metric]))
+        if result["peak_rss_mb"] > before["peak_rss_mb"] * (1 + threshold):
+            regressions.append((result["name"], "peak_rss_mb", before["peak_rss_mb"], result["peak_rss_mb"]))
+    return regressions
+
+
+def machine_info():
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark edge-detection stego embedding and extraction")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Relative change reported as a regression")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="Synthetic cover sides to sweep")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case; the fastest is kept")
+    parser.add_argument("--quick", action="store_true", help="Only sweep small covers, one run per case")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    repeats = 1 if args.quick else args.repeats
+    cases = [case for case in build_cases(sizes) if args.filter in case["name"]]
+
+    results = []
+    for result in run_cases(cases, repeats):
+        print(f"{result['name']:<40} embed {result['embed_mb_s']:>9.3f} MB/s {result['embed_mpix_s']:>9.3f} Mpix/s  "
+              f"extract {result['extract_mb_s']:>9.3f} MB/s {result['extract_mpix_s']:>9.3f} Mpix/s  rss {result['peak_rss_mb']:>8.1f} MB")
+        results.append(result)
+
+    run = {"machine": machine_info(), "repeats": repeats, "results": results}
+    with open(args.output, "w") as output:
+        json.dump(run, output, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as output:
+            json.dump(run, output, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as source:
+        regressions = compare(results, json.load(source), args.threshold)
+    for name, metric, before, after in regressions:
+        print(f"REGRESSION {name} {metric}: {before} -> {after}")
+    print(f"{len(regressions)} regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from .autotune import PARAMS_SIZE, auto_params, read_params, write_params
+from .cache import EdgeMapCache, content_key
+from .codecs import (
+    CODEC_BZ2,
+    CODEC_LZMA,
+    CODEC_NAMES,
+    CODEC_PNG,
+    CODEC_RAW,
+    CODEC_WEBP,
+    CODEC_ZLIB,
+    CodecError,
+    decode_payload,
+    encode_bytes,
+    encode_image,
+)
+from .container import CONTAINER_MAGIC, DIRECTORY_SIZE, ENTRY_SIZE, find_entry, pack_container, parse_directory_head, parse_entries
+from .ecc import ECC_HAMMING, ECC_NAMES, ECC_NONE, ECC_RS, ecc_decode, ecc_encode, ecc_length
+from .engine import (
+    BLOCK_HEIGHT,
+    BLOCK_WIDTH,
+    DEFAULT_THRESHOLD,
+    NUM_BITS,
+    NUM_BITS_EDGE,
+    NUM_BITS_NON_EDGE,
+    CapacityError,
+    StegoEngine,
+    block_bit_widths,
+    block_capacities,
+    block_max_gradients,
+    block_pixel_counts,
+    build_slot_table,
+    capacity,
+    capacity_report,
+    compute_edge_map,
+    edge_grid_shape,
+    embed_symbols,
+    extract_symbols,
+    slot_masks,
+)
+from .packing import as_payload, clip_widths, pack_symbols, symbol_bits, unpack_symbols
+from .images import FAST_PNG_LEVEL, PNG_STRATEGIES, SAVE_FORMATS, as_cover, decode_pixels, encode_pixels, load_pixels, save_pixels
+from .instrument import COUNTERS, STAGES, Instrumentation
+from .metrics import chi_square, histograms, kl_divergence, mse, psnr, quality_report, show_histograms, ssim
+from .permute import FEISTEL_ROUNDS, SlotPermutation, keyed_slot_batches
+from .progress import CHUNK_BLOCK_ROWS, CancelToken, Cancelled
+from .header import (
+    HEADER_SIZE,
+    MAX_DIMENSION,
+    PAYLOAD_BYTES,
+    PAYLOAD_CONTAINER,
+    PAYLOAD_IMAGE,
+    PAYLOAD_TEXT,
+    HeaderError,
+    check_dimensions,
+    pack_header,
+    parse_header,
+    verify_payload,
+)
+from .scan import SCAN_EXTENSIONS, find_images, read_top_rows, scan_file, scan_paths
+from .tiled import BAND_BLOCK_ROWS, create_output, iter_bands, open_cover
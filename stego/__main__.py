@@ -0,0 +1,99 @@
+import argparse
+import json
+import sys
+
+from .ecc import ECC_NAMES
+from .engine import BLOCK_HEIGHT, BLOCK_WIDTH, DEFAULT_THRESHOLD, NUM_BITS_EDGE, NUM_BITS_NON_EDGE
+from .images import PNG_STRATEGIES
+
+
+def add_engine_arguments(parser):
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Threshold for edge detection")
+    parser.add_argument("--edge-bits", type=int, default=NUM_BITS_EDGE, help="Bits per channel in edge blocks")
+    parser.add_argument("--non-edge-bits", type=int, default=NUM_BITS_NON_EDGE, help="Bits per channel in non-edge blocks")
+    parser.add_argument("--block-width", type=int, default=BLOCK_WIDTH, help="Width of the block")
+    parser.add_argument("--block-height", type=int, default=BLOCK_HEIGHT, help="Height of the block")
+    parser.add_argument("--stable-edges", action="store_true", help="Classify blocks on bit planes that embedding leaves untouched")
+    parser.add_argument("--key", default=None, help="Secret that spreads the payload over the image in a keyed order; implies --stable-edges")
+    parser.add_argument("--ecc", choices=sorted(ECC_NAMES.values()), default="none", help="Error-correcting code for payloads: Hamming SECDED or interleaved Reed-Solomon")
+
+
+def add_save_arguments(parser):
+    parser.add_argument("--compress-level", type=int, default=None, help="PNG zlib level 0-9 (1 is fast), WebP effort 0-6 or TIFF deflate if non-zero")
+    parser.add_argument("--png-strategy", choices=sorted(PNG_STRATEGIES), default=None, help="zlib strategy for PNG outputs")
+    parser.add_argument("--optimize", action="store_true", help="Let Pillow search for the smallest PNG (slow)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="stego", description="Edge-detection driven LSB steganography")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Embed or extract the jobs of a CSV/JSONL manifest on a worker pool")
+    batch.add_argument("manifest", help="CSV or JSONL file with cover, payload, output and optional op/kind columns")
+    batch.add_argument("--results", default="results.jsonl", help="Where to write per-job results (.csv or .jsonl)")
+    batch.add_argument("--workers", type=int, default=None, help="Worker processes (default: number of cores)")
+    batch.add_argument("--max-in-flight", type=int, default=None, help="Jobs submitted at once (default: 2 x workers)")
+    batch.add_argument("--metrics", action="store_true", help="Add MSE, PSNR, SSIM and histogram distances to embed results")
+    add_engine_arguments(batch)
+    add_save_arguments(batch)
+
+    metrics = commands.add_parser("metrics", help="Report the distortion of stego images against their covers as JSON")
+    metrics.add_argument("pairs", nargs="+", help="Cover and stego image paths, alternating")
+    metrics.add_argument("--output", default=None, help="Write the JSON report here instead of printing it")
+    metrics.add_argument("--no-ssim", action="store_true", help="Skip SSIM, the slowest metric")
+
+    scan = commands.add_parser("scan", help="Find images carrying a payload header, decoding only their top rows")
+    scan.add_argument("paths", nargs="+", help="Image files or directories to search recursively")
+    scan.add_argument("--results", default="scan.jsonl", help="Where to write per-file results (.csv or .jsonl)")
+    scan.add_argument("--workers", type=int, default=None, help="Worker processes (default: number of cores)")
+    add_engine_arguments(scan)
+
+    serve = commands.add_parser("serve", help="Run the HTTP embed/extract/capacity service")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    serve.add_argument("--workers", type=int, default=None, help="Worker processes (default: number of cores)")
+    # Defaults live in stego.service, which is only imported for this command
+    serve.add_argument("--queue-limit", type=int, default=None, help="Requests allowed to wait for a worker before 503s")
+    serve.add_argument("--timeout", type=float, default=None, help="Seconds allowed for reading a request and for its work")
+    serve.add_argument("--max-body", type=int, default=None, help="Largest accepted request body in bytes")
+    add_engine_arguments(serve)
+    add_save_arguments(serve)
+
+    return parser
+
+
+def metrics_main(args):
+    """
+    Entry point of ``python -m stego metrics``.
+    """
+    from .metrics import quality_report, write_report
+    if len(args.pairs) % 2:
+        print("metrics expects cover and stego paths in pairs", file=sys.stderr)
+        return 2
+    reports = []
+    for cover, stego in zip(args.pairs[::2], args.pairs[1::2]):
+        reports.append(dict(cover=cover, stego=stego, **quality_report(cover, stego, structural=not args.no_ssim)))
+    if args.output:
+        write_report(args.output, reports)
+    else:
+        print(json.dumps(reports, indent=2))
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        from .batch import main as batch_main
+        return batch_main(args)
+    if args.command == "metrics":
+        return metrics_main(args)
+    if args.command == "scan":
+        from .scan import main as scan_main
+        return scan_main(args)
+    if args.command == "serve":
+        from .service import main as serve_main
+        return serve_main(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
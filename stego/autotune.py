@@ -0,0 +1,125 @@
+import struct
+import zlib
+
+import numpy as np
+
+from .engine import BLOCK_HEIGHT, BLOCK_WIDTH, NUM_BITS, NUM_BITS_EDGE, CapacityError, block_max_gradients
+
+PARAMS_MAGIC = b"EA"  # Marks an image whose embedding parameters were chosen by auto_params
+PARAMS_VERSION = 1
+PARAMS_FORMAT = ">2sBfBBBB"  # magic, version, threshold, edge bits, non-edge bits, block width, block height
+PARAMS_SIZE = struct.calcsize(PARAMS_FORMAT) + 2  # Followed by the low 16 bits of its crc32
+PARAM_KEYS = ("threshold", "edge_bits", "non_edge_bits", "block_width", "block_height")
+
+
+def replacement_mse(bits):
+    """
+    Expected squared error of a channel whose ``bits`` low bits are replaced by random bits.
+    """
+    return (4 ** bits - 1) / 6
+
+
+def auto_params(pixels, payload_bytes, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT, max_bits=NUM_BITS_EDGE):
+    """
+    Pick the threshold and bit split that fit ``payload_bytes`` with the lowest expected MSE.
+
+    Edges are classified in stable mode, so for each edge bit width the block gradients
+    are computed once; every threshold and non-edge width is then scored from the sorted
+    gradients without embedding anything. The payload fills the first slots in raster
+    order, so the expected MSE is the mean distortion of all slots scaled by the share
+    of the capacity used. The last block row is left for the ``write_params`` record.
+
+    :param pixels: HxWx3 uint8 cover array
+    :param payload_bytes: Bytes to embed, header included
+    :param max_bits: Largest edge bit width tried
+    :return: Dict with the ``PARAM_KEYS`` plus capacity_bits and expected_mse
+    :raises CapacityError: If no candidate holds the payload
+    """
+    height, width = pixels.shape[:2]
+    if width * 3 < PARAMS_SIZE * NUM_BITS:
+        raise CapacityError(f"Image is narrower than the {-(-PARAMS_SIZE * NUM_BITS // 3)} pixels the parameter record needs")
+
+    block_channels = block_width * block_height * 3
+    usable_rows = (-(-height // block_height) - 1) * block_height
+    channels = usable_rows * width * 3
+    needed = payload_bytes * NUM_BITS
+
+    best = None
+    for edge_bits in range(1, max_bits + 1):
+        gradients = block_max_gradients(pixels, block_width, block_height, edge_bits)
+        values = np.sort(gradients[gradients >= 0])
+        levels = np.unique(values)
+        # Candidate thresholds: every eligible block is an edge, then above each gradient level
+        squared = np.concatenate([[-1], levels])
+        edges = np.concatenate([[values.size], values.size - np.searchsorted(values, levels, "right")])
+        edge_channels = edges.astype(np.int64) * block_channels
+
+        for non_edge_bits in range(edge_bits + 1):
+            capacity = edge_channels * edge_bits + (channels - edge_channels) * non_edge_bits
+            fits = capacity >= needed
+            if not fits.any():
+                continue
+            distortion = edge_channels * replacement_mse(edge_bits) + (channels - edge_channels) * replacement_mse(non_edge_bits)
+            mse = np.where(fits, needed * distortion / np.maximum(capacity, 1) / (height * width * 3), np.inf)
+            index = int(np.argmin(mse))
+            if best is None or mse[index] < best["expected_mse"]:
+                best = {
+                    "threshold": _threshold(int(squared[index])),
+                    "edge_bits": edge_bits,
+                    "non_edge_bits": non_edge_bits,
+                    "block_width": block_width,
+                    "block_height": block_height,
+                    "capacity_bits": int(capacity[index]),
+                    "expected_mse": float(mse[index]),
+                }
+
+    if best is None:
+        raise CapacityError(f"Payload of {payload_bytes} bytes does not fit with up to {max_bits} bits per channel")
+    return best
+
+
+def _threshold(squared):
+    # Halfway to the next integer magnitude, so float32 rounding cannot move a block across it
+    return -1.0 if squared < 0 else float(np.float32(np.sqrt(squared + 0.5)))
+
+
+def pack_params(params):
+    """
+    Encode the ``PARAM_KEYS`` of ``params`` as a ``PARAMS_SIZE`` byte record.
+    """
+    record = struct.pack(PARAMS_FORMAT, PARAMS_MAGIC, PARAMS_VERSION, *(params[key] for key in PARAM_KEYS))
+    return record + struct.pack(">H", zlib.crc32(record) & 0xFFFF)
+
+
+def write_params(pixels, params):
+    """
+    Record ``params`` in the lowest bit of the first channels of the last pixel row.
+
+    That row lies in the last block row, which ``auto_params`` keeps free of payload,
+    and stable edge classification ignores the lowest bit plane.
+
+    :param pixels: C-contiguous, writable HxWx3 uint8 array, modified in place
+    """
+    bits = np.unpackbits(np.frombuffer(pack_params(params), dtype=np.uint8))
+    row = pixels[-1].reshape(-1)[:bits.size]
+    row &= 0xFE
+    row |= bits
+
+
+def read_params(pixels):
+    """
+    Parameters recorded by ``write_params``.
+
+    :return: Dict with the ``PARAM_KEYS``, or None if the image carries no record
+    """
+    count = PARAMS_SIZE * NUM_BITS
+    if pixels.shape[1] * 3 < count:
+        return None
+    record = np.packbits(pixels[-1].reshape(-1)[:count] & 1).tobytes()
+    body, check = record[:-2], struct.unpack(">H", record[-2:])[0]
+    if body[:len(PARAMS_MAGIC)] != PARAMS_MAGIC or zlib.crc32(body) & 0xFFFF != check:
+        return None
+    magic, version, *values = struct.unpack(PARAMS_FORMAT, body)
+    if version != PARAMS_VERSION:
+        return None
+    return dict(zip(PARAM_KEYS, values))
@@ -0,0 +1,203 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+from .codecs import CODEC_NAMES, decode_payload, encode_bytes, encode_image
+from .ecc import ecc_length
+from .engine import StegoEngine, capacity_report
+from .header import HEADER_SIZE, PAYLOAD_BYTES, PAYLOAD_IMAGE, PAYLOAD_TEXT
+from .images import load_pixels
+from .metrics import quality_report
+
+PAYLOAD_KINDS = {"bytes": PAYLOAD_BYTES, "text": PAYLOAD_TEXT, "image": PAYLOAD_IMAGE}
+RESULT_FIELDS = ["index", "op", "cover", "payload", "output", "status", "error", "seconds", "payload_bytes", "codec", "encoded_bytes", "capacity_bits", "used_bits", "capacity_used", "ecc_corrected", "ecc_uncorrectable"]
+QUALITY_FIELDS = ["mse", "psnr", "ssim", "chi_square", "kl_divergence"]  # Added to embed results with metrics on
+
+
+def read_manifest(path):
+    """
+    Read batch jobs from a CSV file with a header row or from JSON lines.
+
+    Every job has ``cover`` and ``output``; embed jobs also have ``payload`` and an
+    optional ``kind`` (bytes, text or image). ``op`` defaults to "embed"; extract jobs
+    read the payload of the stego image in ``cover`` and write it to ``output``.
+
+    :return: List of job dicts
+    """
+    with open(path, newline="") as manifest:
+        if path.lower().endswith(".csv"):
+            return [dict(row) for row in csv.DictReader(manifest)]
+        return [json.loads(line) for line in manifest if line.strip()]
+
+
+def write_results(path, results, fields=None):
+    """
+    Write job results as CSV or JSON lines depending on the extension of ``path``.
+
+    :param fields: CSV columns, by default those of batch jobs
+    """
+    with open(path, "w", newline="") as output:
+        if path.lower().endswith(".csv"):
+            writer = csv.DictWriter(output, fieldnames=fields or RESULT_FIELDS + QUALITY_FIELDS, restval="")
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            for result in results:
+                output.write(json.dumps(result) + "\n")
+
+
+def run_job(index, job, config, save_options=None, metrics=False):
+    """
+    Run one embed or extract job and describe the outcome; never raises.
+
+    :param index: Position of the job in the manifest
+    :param job: Job dict from ``read_manifest``
+    :param config: Keyword arguments for ``StegoEngine``
+    :param save_options: Encoder options for ``save_pixels`` used for image outputs
+    :param metrics: Add the ``QUALITY_FIELDS`` of the stego image to embed results
+    :return: Result dict with the fields of ``RESULT_FIELDS``
+    """
+    op = job.get("op") or "embed"
+    result = dict.fromkeys(RESULT_FIELDS)
+    result.update(index=index, op=op, cover=job.get("cover"), payload=job.get("payload"), output=job.get("output"))
+    start = time.perf_counter()
+    try:
+        engine = StegoEngine(**config)
+        if op == "embed":
+            result.update(_embed(engine, job, save_options or {}, metrics))
+        elif op == "extract":
+            result.update(_extract(engine, job, save_options or {}))
+        else:
+            raise ValueError(f"Unknown op {op!r}")
+        result["status"] = "ok"
+    except Exception as error:
+        result.update(status="error", error=f"{type(error).__name__}: {error}")
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def run_batch(jobs, config, workers=None, max_in_flight=None, save_options=None, metrics=False):
+    """
+    Run jobs on a process pool, keeping at most ``max_in_flight`` of them submitted.
+
+    Bounding the submitted jobs keeps memory flat for manifests with many thousands
+    of entries, since each pending job holds its decoded cover.
+
+    :param jobs: Iterable of job dicts
+    :param config: Keyword arguments for ``StegoEngine``
+    :param workers: Worker processes, defaults to the number of cores
+    :param max_in_flight: Submitted but unfinished jobs, defaults to twice ``workers``
+    :param save_options: Encoder options for ``save_pixels`` used for image outputs
+    :param metrics: See ``run_job``
+    :return: Iterator of result dicts in completion order
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    jobs = enumerate(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for index, job in jobs:
+            pending.add(pool.submit(run_job, index, job, config, save_options, metrics))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def _embed(engine, job, save_options, metrics=False):
+    kind = job.get("kind") or "bytes"
+    if kind not in PAYLOAD_KINDS:
+        raise ValueError(f"Unknown payload kind {kind!r}")
+
+    pixels = load_pixels(job["cover"])
+    height, width = pixels.shape[:2]
+    edge_map = engine.compute_edge_map(pixels)
+    report = capacity_report(edge_map, height, width, engine.edge_bits, engine.non_edge_bits, engine.block_width, engine.block_height)
+
+    hidden_width = hidden_height = 0
+    if kind == "image":
+        hidden = load_pixels(job["payload"])
+        hidden_height, hidden_width = hidden.shape[:2]
+        payload_bytes = hidden.nbytes
+        codec, encoded = encode_image(hidden)
+    else:
+        with open(job["payload"], "rb") as source:
+            payload = source.read()
+        payload_bytes = len(payload)
+        codec, encoded = encode_bytes(payload)
+
+    cover = pixels.copy() if metrics else None
+    engine.embed_with_header(pixels, edge_map, PAYLOAD_KINDS[kind], encoded, hidden_width, hidden_height, codec)
+    engine.save_image(pixels, job["output"], **save_options)
+    usage = _usage(report, payload_bytes, codec, len(encoded), ecc_length(engine.ecc, len(encoded)))
+    if metrics:
+        usage.update(_quality(cover, pixels))
+    return usage
+
+
+def _quality(cover, pixels):
+    # Histogram distances are averaged over the channels to keep the results flat
+    quality = quality_report(cover, pixels)
+    quality["chi_square"] = sum(quality["chi_square"].values()) / 3
+    quality["kl_divergence"] = sum(quality["kl_divergence"].values()) / 3
+    return {field: quality[field] for field in QUALITY_FIELDS}
+
+
+def _extract(engine, job, save_options):
+    pixels = load_pixels(job["cover"])
+    height, width = pixels.shape[:2]
+    header, encoded = engine.extract_with_header(pixels)
+    payload = decode_payload(header["codec"], encoded)
+    if header["payload_type"] == PAYLOAD_IMAGE:
+        hidden = np.frombuffer(payload, dtype=np.uint8).reshape(header["height"], header["width"], 3)
+        engine.save_image(hidden, job["output"], **save_options)
+    else:
+        with open(job["output"], "wb") as output:
+            output.write(payload)
+    report = capacity_report(engine.compute_edge_map(pixels), height, width, engine.edge_bits, engine.non_edge_bits, engine.block_width, engine.block_height)
+    usage = _usage(report, len(payload), header["codec"], len(encoded), header["length"])
+    if header["ecc"]:
+        usage.update(ecc_corrected=header["corrected"], ecc_uncorrectable=header["uncorrectable"])
+    return usage
+
+
+def _usage(report, payload_bytes, codec, encoded_bytes, embedded_bytes):
+    used_bits = (HEADER_SIZE + embedded_bytes) * 8
+    return {
+        "payload_bytes": payload_bytes,
+        "codec": CODEC_NAMES[codec],
+        "encoded_bytes": encoded_bytes,
+        "capacity_bits": report["total_bits"],
+        "used_bits": used_bits,
+        "capacity_used": round(used_bits / report["total_bits"], 6) if report["total_bits"] else None,
+    }
+
+
+def main(args):
+    """
+    Entry point of ``python -m stego batch``.
+    """
+    config = {
+        "threshold": args.threshold,
+        "edge_bits": args.edge_bits,
+        "non_edge_bits": args.non_edge_bits,
+        "block_width": args.block_width,
+        "block_height": args.block_height,
+        "stable_edges": args.stable_edges,
+        "key": args.key,
+        "ecc": args.ecc,
+    }
+    save_options = {"compress_level": args.compress_level, "strategy": args.png_strategy, "optimize": args.optimize}
+    jobs = read_manifest(args.manifest)
+    results = sorted(run_batch(jobs, config, args.workers, args.max_in_flight, save_options, args.metrics), key=lambda result: result["index"])
+    write_results(args.results, results)
+
+    failed = sum(result["status"] != "ok" for result in results)
+    print(f"{len(results) - failed} of {len(results)} jobs succeeded, results written to {args.results}")
+    return 1 if failed else 0
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024  # In-memory budget for cached arrays
+
+
+def content_key(*parts):
+    """
+    Hash arrays and plain values into a hex cache key.
+
+    Arrays contribute their shape, dtype and raw bytes, so two covers with the same
+    pixels share a key wherever they were loaded from.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(repr((part.shape, part.dtype.str)).encode())
+            digest.update(np.ascontiguousarray(part).data)
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class EdgeMapCache:
+    """
+    Bounded LRU cache of edge maps and slot tables, with an optional on-disk tier.
+
+    Entries are dicts of NumPy arrays. The memory tier evicts the least recently used
+    entries once their arrays exceed ``max_bytes`` and never holds an entry larger than
+    that; the disk tier keeps one ``.npz`` file per entry in ``directory`` and is never
+    evicted by this class.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        """
+        Cached arrays for ``key``, promoting disk entries into memory, or None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._load(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, **arrays):
+        """
+        Store read-only copies of ``arrays`` under ``key`` in memory and on disk.
+
+        :return: The stored entry
+        """
+        entry = {}
+        for name, array in arrays.items():
+            array = np.array(array)
+            array.flags.writeable = False
+            entry[name] = array
+
+        if self.directory:
+            # A private temporary file per writer, so processes storing the same key never share one
+            descriptor, temporary = tempfile.mkstemp(suffix=".tmp.npz", dir=self.directory)
+            try:
+                with os.fdopen(descriptor, "wb") as output:
+                    np.savez(output, **entry)
+                os.replace(temporary, self._path(key))
+            except BaseException:
+                os.remove(temporary)
+                raise
+        with self.lock:
+            self._remember(key, entry)
+        return entry
+
+    def clear(self):
+        """
+        Drop the memory tier; files on disk are kept.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _remember(self, key, entry):
+        if key in self.entries:
+            self.size -= _nbytes(self.entries.pop(key))
+        size = _nbytes(entry)
+        if size > self.max_bytes:
+            return  # Would break the bound on its own; callers still get the entry
+        self.entries[key] = entry
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= _nbytes(evicted)
+
+    def _load(self, key):
+        if not self.directory or not os.path.exists(self._path(key)):
+            return None
+        with np.load(self._path(key)) as stored:
+            entry = {name: stored[name] for name in stored.files}
+        for array in entry.values():
+            array.flags.writeable = False
+        return entry
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+
+def _nbytes(entry):
+    return sum(array.nbytes for array in entry.values())
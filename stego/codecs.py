@@ -0,0 +1,108 @@
+import bz2
+import io
+import lzma
+import zlib
+
+from PIL import Image, features
+import numpy as np
+
+CODEC_RAW = 0  # Stored as is
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODEC_BZ2 = 3
+CODEC_PNG = 4  # Hidden image as PNG bytes
+CODEC_WEBP = 5  # Hidden image as lossless WebP bytes
+
+CODEC_NAMES = {CODEC_RAW: "raw", CODEC_ZLIB: "zlib", CODEC_LZMA: "lzma", CODEC_BZ2: "bz2", CODEC_PNG: "png", CODEC_WEBP: "webp"}
+BYTES_CODECS = (CODEC_ZLIB, CODEC_LZMA, CODEC_BZ2)
+IMAGE_CODECS = (CODEC_PNG, CODEC_WEBP)
+
+
+class CodecError(ValueError):
+    """
+    Raised when a payload cannot be decoded with the codec recorded in its header.
+    """
+
+
+def encode_bytes(data, codecs=BYTES_CODECS):
+    """
+    Compress bytes with every codec in ``codecs`` and keep the smallest result.
+
+    The raw bytes are always a candidate, so incompressible payloads never grow.
+
+    :return: Tuple of (codec, encoded bytes)
+    """
+    data = bytes(data)
+    best = (CODEC_RAW, data)
+    for codec in codecs:
+        encoded = _compress(codec, data)
+        if len(encoded) < len(best[1]):
+            best = (codec, encoded)
+    return best
+
+
+def encode_image(pixels, codecs=IMAGE_CODECS):
+    """
+    Encode an HxWx3 uint8 image losslessly with every codec in ``codecs`` and keep the smallest.
+
+    WebP is skipped when Pillow was built without it; raw pixels are always a candidate.
+
+    :return: Tuple of (codec, encoded bytes)
+    """
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    best = (CODEC_RAW, pixels.tobytes())
+    image = Image.fromarray(pixels, "RGB")
+    for codec in codecs:
+        if codec == CODEC_WEBP and not features.check("webp"):
+            continue
+        buffer = io.BytesIO()
+        if codec == CODEC_PNG:
+            image.save(buffer, format="PNG", compress_level=9)
+        elif codec == CODEC_WEBP:
+            image.save(buffer, format="WEBP", lossless=True, quality=100, method=6)
+        else:
+            raise CodecError(f"{CODEC_NAMES.get(codec, codec)} is not an image codec")
+        if buffer.tell() < len(best[1]):
+            best = (codec, buffer.getvalue())
+    return best
+
+
+def decode_payload(codec, data):
+    """
+    Undo ``encode_bytes`` or ``encode_image``.
+
+    :param codec: ``CODEC_*`` constant recorded in the header
+    :param data: Encoded payload bytes or uint8 array
+    :return: Decoded bytes; images come back as their raw RGB pixel bytes
+    :raises CodecError: If the codec is unknown or the data is corrupt
+    """
+    data = bytes(data)
+    try:
+        if codec == CODEC_RAW:
+            return data
+        if codec in BYTES_CODECS:
+            return _decompress(codec, data)
+        if codec in IMAGE_CODECS:
+            with Image.open(io.BytesIO(data)) as image:
+                return image.convert("RGB").tobytes()
+    except (OSError, ValueError, EOFError, zlib.error, lzma.LZMAError) as error:
+        raise CodecError(f"Payload is not valid {CODEC_NAMES[codec]} data: {error}") from error
+    raise CodecError(f"Unknown payload codec {codec}")
+
+
+def _compress(codec, data):
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, 9)
+    if codec == CODEC_LZMA:
+        return lzma.compress(data)
+    if codec == CODEC_BZ2:
+        return bz2.compress(data, 9)
+    raise CodecError(f"{CODEC_NAMES.get(codec, codec)} is not a bytes codec")
+
+
+def _decompress(codec, data):
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_LZMA:
+        return lzma.decompress(data)
+    return bz2.decompress(data)
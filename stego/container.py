@@ -0,0 +1,122 @@
+import struct
+import zlib
+
+import numpy as np
+
+from .codecs import CODEC_RAW
+from .header import HEADER_SIZE, PAYLOAD_BYTES, HeaderError, check_dimensions
+from .packing import as_payload
+
+CONTAINER_MAGIC = b"EC"  # Marks the directory at the start of a container payload
+CONTAINER_VERSION = 1
+DIRECTORY_FORMAT = ">2sBHII"  # magic, version, entry count, size of the entry records, crc32 of the entry records
+DIRECTORY_SIZE = struct.calcsize(DIRECTORY_FORMAT)
+ENTRY_FORMAT = ">BBBHHIII"  # name length, payload type, codec, width, height, offset, length, crc32; followed by the name
+ENTRY_SIZE = struct.calcsize(ENTRY_FORMAT)
+ENTRY_KEYS = ("payload_type", "codec", "width", "height", "offset", "length", "crc32")
+MAX_NAME_BYTES = 255  # Longest UTF-8 entry name
+
+
+def pack_container(entries):
+    """
+    Build a container payload: a directory of the entries followed by their payloads.
+
+    Entry offsets count bytes from the start of the embedded stream, header included,
+    so entry bytes ``offset`` to ``offset + length`` sit in payload bits ``8 * offset``
+    to ``8 * (offset + length)`` of the slot order.
+
+    :param entries: Iterable of dicts with a name and payload, and optionally a
+        payload_type, codec, width and height as for ``pack_header``
+    :return: Tuple of (uint8 container array, list of directory entry dicts)
+    :raises ValueError: If a name is empty, too long or used twice, or an image is too large
+    """
+    records, payloads, directory = [], [], []
+    for entry in entries:
+        payload = as_payload(entry["payload"])
+        name = entry["name"].encode("utf-8")
+        if not name or len(name) > MAX_NAME_BYTES:
+            raise ValueError(f"Entry names must be 1 to {MAX_NAME_BYTES} UTF-8 bytes, got {entry['name']!r}")
+        if any(existing["name"] == entry["name"] for existing in directory):
+            raise ValueError(f"Duplicate entry name {entry['name']!r}")
+        check_dimensions(entry.get("width", 0), entry.get("height", 0))
+        directory.append({
+            "name": entry["name"],
+            "payload_type": entry.get("payload_type", PAYLOAD_BYTES),
+            "codec": entry.get("codec", CODEC_RAW),
+            "width": entry.get("width", 0),
+            "height": entry.get("height", 0),
+            "length": payload.size,
+            "crc32": zlib.crc32(payload),
+        })
+        payloads.append(payload)
+        records.append(name)
+
+    offset = HEADER_SIZE + DIRECTORY_SIZE + sum(ENTRY_SIZE + len(name) for name in records)
+    for index, entry in enumerate(directory):
+        entry["offset"] = offset
+        offset += entry["length"]
+        records[index] = struct.pack(ENTRY_FORMAT, len(records[index]), *(entry[key] for key in ENTRY_KEYS)) + records[index]
+
+    body = b"".join(records)
+    head = struct.pack(DIRECTORY_FORMAT, CONTAINER_MAGIC, CONTAINER_VERSION, len(directory), len(body), zlib.crc32(body))
+    parts = [np.frombuffer(head + body, dtype=np.uint8)] + payloads
+    return np.concatenate(parts), directory
+
+
+def parse_directory_head(data):
+    """
+    Decode the fixed ``DIRECTORY_SIZE`` bytes that open a container.
+
+    :return: Dict with count, size and crc32 of the entry records
+    :raises HeaderError: If the magic or version does not match
+    """
+    magic, version, count, size, crc = struct.unpack(DIRECTORY_FORMAT, bytes(data[:DIRECTORY_SIZE]))
+    if magic != CONTAINER_MAGIC:
+        raise HeaderError("Payload is not a container")
+    if version != CONTAINER_VERSION:
+        raise HeaderError(f"Unsupported container version {version}")
+    return {"count": count, "size": size, "crc32": crc}
+
+
+def parse_entries(head, data):
+    """
+    Decode the entry records that follow the directory head.
+
+    :return: List of directory entry dicts as returned by ``pack_container``
+    :raises HeaderError: If the records fail their checksum or are malformed
+    """
+    data = bytes(data)
+    if len(data) != head["size"] or zlib.crc32(data) != head["crc32"]:
+        raise HeaderError("Container directory failed its checksum")
+    directory, position = [], 0
+    for _ in range(head["count"]):
+        if position + ENTRY_SIZE > len(data):
+            raise HeaderError("Container directory is truncated")
+        name_length, *values = struct.unpack_from(ENTRY_FORMAT, data, position)
+        position += ENTRY_SIZE
+        name = data[position:position + name_length].decode("utf-8")
+        position += name_length
+        directory.append(dict(name=name, **dict(zip(ENTRY_KEYS, values))))
+    return directory
+
+
+def find_entry(directory, name):
+    """
+    Directory entry called ``name``.
+
+    :raises KeyError: If the container has no such entry
+    """
+    for entry in directory:
+        if entry["name"] == name:
+            return entry
+    raise KeyError(f"Container has no entry named {name!r}")
+
+
+def verify_entry(entry, payload):
+    """
+    Check an entry payload against the length and checksum in its directory entry.
+
+    :raises HeaderError: If the payload is truncated or corrupted
+    """
+    if len(payload) != entry["length"] or zlib.crc32(payload) != entry["crc32"]:
+        raise HeaderError(f"Container entry {entry['name']!r} failed its checksum")
@@ -0,0 +1,276 @@
+import struct
+
+import numpy as np
+
+from .codecs import CodecError
+
+ECC_NONE = 0  # Payload embedded as is
+ECC_HAMMING = 1  # Extended Hamming(8,4) SECDED, one byte per nibble
+ECC_RS = 2  # Interleaved Reed-Solomon RS(255,223) over GF(256)
+ECC_NAMES = {ECC_NONE: "none", ECC_HAMMING: "hamming", ECC_RS: "rs"}
+
+RS_N = 255  # Symbols per Reed-Solomon codeword
+RS_PARITY = 32  # Parity symbols per codeword; up to RS_PARITY // 2 symbol errors are corrected
+RS_K = RS_N - RS_PARITY  # Data symbols per codeword
+RS_BATCH = 4096  # Erroneous codewords corrected together, bounding the temporary arrays
+RS_LENGTH = struct.Struct(">I")  # Payload length stored ahead of the data so padding can be dropped
+GF_POLYNOMIAL = 0x11D  # Primitive polynomial of GF(256), generator 2
+
+
+def _gf_tables():
+    exp = np.zeros(512, dtype=np.int64)
+    log = np.zeros(256, dtype=np.int64)
+    value = 1
+    for power in range(255):
+        exp[power] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= GF_POLYNOMIAL
+    exp[255:] = exp[:257]
+    product = exp[log[:, None] + log[None, :]]
+    product[0, :] = product[:, 0] = 0
+    return exp, log, product.astype(np.uint8)
+
+
+GF_EXP, GF_LOG, GF_MUL = _gf_tables()
+
+
+def _poly_mul(p, q):
+    product = [0] * (len(p) + len(q) - 1)
+    for i, a in enumerate(p):
+        for j, b in enumerate(q):
+            product[i + j] ^= int(GF_MUL[a, b])
+    return product
+
+
+def _generator(parity):
+    poly = [1]
+    for power in range(parity):
+        poly = _poly_mul(poly, [1, int(GF_EXP[power])])
+    return np.array(poly[1:], dtype=np.uint8)
+
+
+RS_GENERATOR = _generator(RS_PARITY)  # Generator polynomial without its leading 1
+
+
+def _rs_tables():
+    values = np.arange(256)[None, :, None]
+    # Syndrome contribution of value v at codeword symbol i: v * alpha^(j * (RS_N - 1 - i)) for every root j
+    exponents = (np.arange(RS_PARITY)[None, :] * (RS_N - 1 - np.arange(RS_N))[:, None]) % 255
+    syndromes = GF_MUL[values, GF_EXP[exponents][:, None, :]]
+    # Term of coefficient v at degree k, evaluated at alpha^-p for p in 0..255 (255 pads to whole words)
+    exponents = (-np.arange(RS_PARITY + 1)[:, None] * np.arange(256)[None, :]) % 255
+    evaluations = GF_MUL[values, GF_EXP[exponents][:, None, :]]
+    # Viewed as 64-bit words, so a gather and XOR handle eight roots or points at once
+    return np.ascontiguousarray(syndromes).view(np.uint64), np.ascontiguousarray(evaluations).view(np.uint64)
+
+
+RS_SYNDROME_TABLE, RS_EVAL_TABLE = _rs_tables()
+
+
+def _hamming_tables():
+    encode = np.zeros(16, dtype=np.uint8)
+    for nibble in range(16):
+        d1, d2, d3, d4 = (nibble >> 3) & 1, (nibble >> 2) & 1, (nibble >> 1) & 1, nibble & 1
+        bits = [d1 ^ d2 ^ d4, d1 ^ d3 ^ d4, d1, d2 ^ d3 ^ d4, d2, d3, d4]  # p1 p2 d1 p3 d2 d3 d4
+        bits.append(sum(bits) & 1)  # Overall parity makes single errors correctable, double errors detectable
+        encode[nibble] = int("".join(map(str, bits)), 2)
+
+    distances = np.unpackbits((np.arange(256)[:, None] ^ encode[None, :]).astype(np.uint8)[..., None], axis=-1).sum(axis=-1)
+    decode = distances.argmin(axis=1).astype(np.uint8)
+    status = np.minimum(distances.min(axis=1), 2).astype(np.uint8)  # 0 clean, 1 corrected, 2 uncorrectable
+    return encode, decode, status
+
+
+HAMMING_ENCODE, HAMMING_DECODE, HAMMING_STATUS = _hamming_tables()
+
+
+def ecc_scheme(value):
+    """
+    ``ECC_*`` constant for a scheme name such as "rs", or for the constant itself.
+
+    :raises ValueError: If the scheme is unknown
+    """
+    if value is None:
+        return ECC_NONE
+    names = {name: scheme for scheme, name in ECC_NAMES.items()}
+    if isinstance(value, str) and value.lower() in names:
+        return names[value.lower()]
+    if value in ECC_NAMES:
+        return int(value)
+    raise ValueError(f"Unknown ECC scheme {value!r}, expected one of {', '.join(names)}")
+
+
+def ecc_length(scheme, size):
+    """
+    Encoded size of a ``size`` byte payload under ``scheme``.
+    """
+    if scheme == ECC_HAMMING:
+        return 2 * size
+    if scheme == ECC_RS:
+        return -(-(size + RS_LENGTH.size) // RS_K) * RS_N
+    return size
+
+
+def ecc_encode(scheme, data):
+    """
+    Protect payload bytes with an error-correcting code.
+
+    :param scheme: ``ECC_*`` constant
+    :param data: Bytes or uint8 array
+    :return: uint8 array of ``ecc_length(scheme, len(data))`` bytes
+    """
+    data = np.frombuffer(bytes(data), dtype=np.uint8) if not isinstance(data, np.ndarray) else data.reshape(-1)
+    if scheme == ECC_NONE:
+        return data
+    if scheme == ECC_HAMMING:
+        return np.stack([HAMMING_ENCODE[data >> 4], HAMMING_ENCODE[data & 0x0F]], axis=1).reshape(-1)
+    if scheme == ECC_RS:
+        return _rs_encode(data)
+    raise CodecError(f"Unknown ECC scheme {scheme}")
+
+
+def ecc_decode(scheme, data):
+    """
+    Correct and strip the code added by ``ecc_encode``.
+
+    Blocks with more errors than the code corrects are returned as read, so the
+    payload checksum decides whether the result is usable.
+
+    :return: Tuple of (uint8 payload array, corrected errors, uncorrectable blocks);
+        Hamming counts bit errors and bytes, Reed-Solomon counts symbols and codewords
+    :raises CodecError: If the data cannot hold a payload of ``scheme``
+    """
+    data = np.frombuffer(bytes(data), dtype=np.uint8) if not isinstance(data, np.ndarray) else data.reshape(-1)
+    if scheme == ECC_NONE:
+        return data, 0, 0
+    if scheme == ECC_HAMMING:
+        if data.size % 2:
+            raise CodecError("Hamming payload has an odd number of bytes")
+        status = HAMMING_STATUS[data]
+        nibbles = HAMMING_DECODE[data].reshape(-1, 2)
+        payload = (nibbles[:, 0] << 4) | nibbles[:, 1]
+        return payload, int(np.count_nonzero(status == 1)), int(np.count_nonzero(status == 2))
+    if scheme == ECC_RS:
+        return _rs_decode(data)
+    raise CodecError(f"Unknown ECC scheme {scheme}")
+
+
+def _rs_encode(data):
+    framed = np.concatenate([np.frombuffer(RS_LENGTH.pack(data.size), dtype=np.uint8), data])
+    codewords = -(-framed.size // RS_K)
+    messages = np.zeros((codewords, RS_K), dtype=np.uint8)
+    messages.reshape(-1)[:framed.size] = framed
+
+    # Systematic encoding: the parity is the remainder of message * x^parity by the
+    # generator, computed for every codeword at once with a shift register
+    parity = np.zeros((codewords, RS_PARITY), dtype=np.uint8)
+    for column in range(RS_K):
+        feedback = messages[:, column] ^ parity[:, 0]
+        parity[:, :-1] = parity[:, 1:]
+        parity[:, -1] = 0
+        parity ^= GF_MUL[feedback[:, None], RS_GENERATOR[None, :]]
+
+    # Interleave: symbol i of every codeword is stored together, so a burst of
+    # corrupted bytes is spread over many codewords
+    return np.concatenate([messages, parity], axis=1).T.reshape(-1)
+
+
+def _rs_syndromes(codewords):
+    syndromes = np.zeros((codewords.shape[0], RS_PARITY // 8), dtype=np.uint64)
+    for column in range(RS_N):
+        syndromes ^= RS_SYNDROME_TABLE[column, codewords[:, column]]
+    return syndromes.view(np.uint8)
+
+
+def _rs_decode(data):
+    if data.size % RS_N or data.size == 0:
+        raise CodecError(f"Reed-Solomon payload is not a whole number of {RS_N} byte codewords")
+    codewords = data.reshape(RS_N, -1).T.copy()
+    syndromes = _rs_syndromes(codewords)
+
+    corrected = uncorrectable = 0
+    rows = np.flatnonzero(syndromes.any(axis=1))
+    for first in range(0, rows.size, RS_BATCH):
+        batch = rows[first:first + RS_BATCH]
+        words, errors = _rs_correct(codewords[batch], syndromes[batch])
+        fixed = errors >= 0
+        codewords[batch[fixed]] = words[fixed]  # Rows that could not be corrected are left as read
+        corrected += int(errors[fixed].sum())
+        uncorrectable += int(batch.size - np.count_nonzero(fixed))
+
+    framed = codewords[:, :RS_K].reshape(-1)
+    length = RS_LENGTH.unpack(framed[:RS_LENGTH.size].tobytes())[0]
+    return framed[RS_LENGTH.size:RS_LENGTH.size + length], corrected, uncorrectable
+
+
+def _gf_div(a, b):
+    # Elementwise a / b over arrays, b non-zero
+    quotient = GF_EXP[(GF_LOG[a] + 255 - GF_LOG[b]) % 255].astype(np.uint8)
+    return np.where(a == 0, np.uint8(0), quotient)
+
+
+def _rows_eval(coefficients):
+    # Evaluate one polynomial per row (lowest degree first) at alpha^-p for every degree p
+    result = np.zeros((coefficients.shape[0], 256 // 8), dtype=np.uint64)
+    for power in range(coefficients.shape[1]):
+        result ^= RS_EVAL_TABLE[power, coefficients[:, power]]
+    return result.view(np.uint8)[:, :RS_N]
+
+
+def _rs_correct(codewords, syndromes):
+    # Correct a batch of codewords with non-zero syndromes at once. Returns the
+    # corrected rows and the symbols fixed per row, -1 where a row is uncorrectable.
+    locator, errors = _error_locators(syndromes)
+    ok = errors * 2 <= RS_PARITY
+
+    # Chien search: degree p is wrong where the locator has the root alpha^-p
+    roots = _rows_eval(locator) == 0
+    ok &= roots.sum(axis=1) == errors
+
+    # Forney: magnitude X * omega(X^-1) / locator'(X^-1), omega = S(x) * locator(x) mod x^parity
+    omega = np.zeros_like(syndromes)
+    for power in range(RS_PARITY):
+        omega[:, power:] ^= GF_MUL[locator[:, power, None], syndromes[:, :RS_PARITY - power]]
+    derivative = np.zeros_like(locator[:, 1:])
+    derivative[:, ::2] = locator[:, 1::2]
+    denominators = _rows_eval(derivative)
+    ok &= ~(roots & (denominators == 0)).any(axis=1)
+    numerators = GF_MUL[GF_EXP[:RS_N].astype(np.uint8)[None, :], _rows_eval(omega)]
+    magnitudes = np.where(roots, _gf_div(numerators, np.maximum(denominators, 1)), np.uint8(0))
+
+    # Degree p is symbol RS_N - 1 - p; a corrected row must have zero syndromes
+    corrected = codewords ^ magnitudes[:, ::-1]
+    ok &= ~_rs_syndromes(corrected).any(axis=1)
+    return corrected, np.where(ok, errors, -1)
+
+
+def _error_locators(syndromes):
+    # Berlekamp-Massey on every row at once, lowest degree first: (locators, degrees)
+    rows = syndromes.shape[0]
+    locator = np.zeros((rows, RS_PARITY + 1), dtype=np.uint8)
+    locator[:, 0] = 1
+    previous = locator.copy()
+    length = np.zeros(rows, dtype=np.int64)
+    shift = np.ones(rows, dtype=np.int64)
+    scale = np.ones(rows, dtype=np.uint8)
+    columns = np.arange(RS_PARITY + 1)
+    for index in range(RS_PARITY):
+        powers = np.arange(1, index + 1)
+        terms = GF_MUL[locator[:, 1:index + 1], syndromes[:, index - powers]]
+        terms[powers[None, :] > length[:, None]] = 0
+        delta = syndromes[:, index] ^ np.bitwise_xor.reduce(terms, axis=1)
+
+        # locator - delta / scale * x^shift * previous, for the rows with a discrepancy
+        sources = columns[None, :] - shift[:, None]
+        shifted = np.where(sources >= 0, np.take_along_axis(previous, np.maximum(sources, 0), axis=1), np.uint8(0))
+        updated = locator ^ GF_MUL[_gf_div(delta, scale)[:, None], shifted]
+
+        grow = (delta != 0) & (2 * length <= index)
+        previous = np.where(grow[:, None], locator, previous)
+        length = np.where(grow, index + 1 - length, length)
+        scale = np.where(grow, delta, scale)
+        shift = np.where(grow, 1, shift + 1)
+        locator = np.where((delta != 0)[:, None], updated, locator)
+    return locator, length
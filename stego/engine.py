@@ -0,0 +1,1072 @@
+import copy
+import zlib
+
+from PIL import Image
+import numpy as np
+
+from .cache import content_key
+from .codecs import CODEC_RAW
+from .ecc import ECC_NONE, ecc_decode, ecc_encode, ecc_length, ecc_scheme
+from .header import HEADER_SIZE, MAGIC, PAYLOAD_BYTES, PAYLOAD_CONTAINER, HeaderError, has_magic, pack_header, pack_header_values, parse_header, verify_payload
+from .images import load_pixels, save_pixels
+from .instrument import NO_STAGE
+from .packing import as_payload, clip_widths, pack_symbols, symbol_bits, unpack_symbols
+from .progress import CHUNK_BLOCK_ROWS
+from .tiled import BAND_BLOCK_ROWS, create_output, iter_bands, open_cover
+
+DEFAULT_THRESHOLD = 128  # Threshold for edge detection
+NUM_BITS = 8  # Bit depth for each pixel channel
+NUM_BITS_EDGE = 4  # Number of bits for edge blocks
+NUM_BITS_NON_EDGE = 1  # Number of bits for non-edge blocks
+BLOCK_WIDTH = 3  # Width of the block
+BLOCK_HEIGHT = 3  # Height of the block
+
+
+class CapacityError(ValueError):
+    """
+    Raised when a payload does not fit into the slots of a cover image.
+    """
+
+
+def edge_grid_shape(height, width, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT):
+    """
+    Number of block rows and block columns covering an image, including partial blocks.
+    """
+    return -(-height // block_height), -(-width // block_width)
+
+
+def compute_edge_map(pixels, threshold=DEFAULT_THRESHOLD, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT, plane_bits=None):
+    """
+    Classify every block of an image as edge or non-edge in a single vectorized pass.
+
+    By default the result matches calling ``is_edge_block`` for every block: blocks whose
+    right or bottom neighbour falls outside the image are non-edge, and gradients of the
+    R channel are evaluated with the same modulo-256 arithmetic as the uint8 per-block
+    check so that existing stego images keep their classification.
+
+    With ``plane_bits`` the low ``plane_bits`` bits of the R channel are ignored and the
+    true gradient magnitude is used. Embedding never changes those upper bit planes, so
+    the cover and the stego image classify every block the same way.
+
+    :param pixels: HxWx3 array of RGB pixels
+    :param threshold: Gradient magnitude above which a pixel marks its block as an edge
+    :param block_width: Width of the block
+    :param block_height: Height of the block
+    :param plane_bits: Number of low bit planes to ignore, or None for the legacy check
+    :return: Boolean array of shape (block rows, block columns)
+    """
+    if plane_bits is not None:
+        gradients = block_max_gradients(pixels, block_width, block_height, plane_bits)
+        return gradients >= 0 if threshold < 0 else gradients > threshold * threshold
+
+    height, width = pixels.shape[:2]
+    edge_map = np.zeros(edge_grid_shape(height, width, block_width, block_height), dtype=bool)
+    squared, rows, cols = _squared_gradients(pixels, block_width, block_height)
+    if squared is None:
+        return edge_map
+
+    # sqrt(magnitude) > threshold for every representable uint8 squared magnitude
+    above = np.sqrt(np.arange(256, dtype=np.uint8)) > threshold
+    edge_pixels = above[squared & 0xFF]
+    edge_map[:rows, :cols] = edge_pixels.reshape(rows, block_height, cols, block_width).any(axis=(1, 3))
+    return edge_map
+
+
+def block_max_gradients(pixels, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT, plane_bits=0):
+    """
+    Largest squared gradient magnitude of the R channel in every block.
+
+    The low ``plane_bits`` bit planes are ignored. Blocks that can never be edges
+    are -1, so the stable edge map for a threshold ``t >= 0`` is ``gradients > t * t``.
+
+    :return: int32 array of shape (block rows, block columns)
+    """
+    height, width = pixels.shape[:2]
+    gradients = np.full(edge_grid_shape(height, width, block_width, block_height), -1, dtype=np.int32)
+    squared, rows, cols = _squared_gradients(pixels, block_width, block_height, plane_bits)
+    if squared is not None:
+        gradients[:rows, :cols] = squared.reshape(rows, block_height, cols, block_width).max(axis=(1, 3))
+    return gradients
+
+
+def _squared_gradients(pixels, block_width, block_height, plane_bits=0):
+    # Only blocks with a full neighbour row below and column to the right can be edges
+    rows = (pixels.shape[0] - 1) // block_height
+    cols = (pixels.shape[1] - 1) // block_width
+    if rows <= 0 or cols <= 0:
+        return None, rows, cols
+
+    inner_height = rows * block_height
+    inner_width = cols * block_width
+    red = pixels[:inner_height + 1, :inner_width + 1, 0].astype(np.int32)
+    if plane_bits:
+        red &= (0xFF << plane_bits) & 0xFF
+    gx = red[:inner_height, 1:] - red[:inner_height, :-1]
+    gy = red[1:, :inner_width] - red[:-1, :inner_width]
+    return gx * gx + gy * gy, rows, cols
+
+
+def block_pixel_counts(height, width, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT):
+    """
+    Number of in-bounds pixels in every block; partial blocks sit on the right and bottom.
+    """
+    rows, cols = edge_grid_shape(height, width, block_width, block_height)
+    block_rows = np.minimum(block_height, height - np.arange(rows) * block_height)
+    block_cols = np.minimum(block_width, width - np.arange(cols) * block_width)
+    return np.outer(block_rows, block_cols)
+
+
+def block_bit_widths(edge_map, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE):
+    """
+    Bits stored per channel in every block of an edge map.
+    """
+    return np.where(edge_map, edge_bits, non_edge_bits).astype(np.uint8)
+
+
+def block_capacities(edge_map, height, width, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT):
+    """
+    Payload bits every block can hold: pixels x 3 channels x bits per channel.
+    """
+    counts = block_pixel_counts(height, width, block_width, block_height)
+    return counts.astype(np.int64) * 3 * block_bit_widths(edge_map, edge_bits, non_edge_bits)
+
+
+def build_slot_table(edge_map, height, width, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT, block_rows=None, first_row=0):
+    """
+    Flat channel index and bit width of every (pixel, channel) slot in embedding order.
+
+    Blocks are visited in raster order, pixels row by row inside a block and R, G, B
+    inside a pixel, which is the order of the original nested embedding loops. Slots of
+    zero width carry no payload and are left out.
+
+    :param edge_map: Boolean block grid from ``compute_edge_map``
+    :param height: Image height in pixels
+    :param width: Image width in pixels
+    :param block_rows: Optional slice of block rows to restrict the table to
+    :param first_row: Block row of the image that row 0 of ``edge_map`` describes
+    :return: Tuple of (int64 indices into ``pixels.reshape(-1)``, uint8 widths)
+    """
+    rows = range(edge_map.shape[0])[block_rows if block_rows is not None else slice(None)]
+    cols = edge_map.shape[1]
+    block_widths = block_bit_widths(edge_map[rows.start:rows.stop:rows.step], edge_bits, non_edge_bits)
+
+    # Axes: block row, block column, row in block, column in block, channel
+    y = (np.asarray(rows, dtype=np.int64) + first_row)[:, None, None, None, None] * block_height + np.arange(block_height)[None, None, :, None, None]
+    x = np.arange(cols, dtype=np.int64)[None, :, None, None, None] * block_width + np.arange(block_width)[None, None, None, :, None]
+    channel = np.arange(3)[None, None, None, None, :]
+    shape = (len(rows), cols, block_height, block_width, 3)
+
+    valid = np.broadcast_to((y < height) & (x < width) & (block_widths[:, :, None, None, None] > 0), shape)
+    indices = np.broadcast_to((y * width + x) * 3 + channel, shape)[valid]
+    widths = np.broadcast_to(block_widths[:, :, None, None, None], shape)[valid]
+    return indices, widths
+
+
+def capacity_report(edge_map, height, width, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT):
+    """
+    Summarise how many payload bits an image with the given edge map can hold.
+
+    :return: Dict with block counts and capacities per class and in total
+    """
+    capacities = block_capacities(edge_map, height, width, edge_bits, non_edge_bits, block_width, block_height)
+    edge_capacity = int(capacities[edge_map].sum())
+    non_edge_capacity = int(capacities[~edge_map].sum())
+    return {
+        "width": width,
+        "height": height,
+        "edge_blocks": int(edge_map.sum()),
+        "non_edge_blocks": int(edge_map.size - edge_map.sum()),
+        "edge_capacity_bits": edge_capacity,
+        "non_edge_capacity_bits": non_edge_capacity,
+        "total_bits": edge_capacity + non_edge_capacity,
+        "total_bytes": (edge_capacity + non_edge_capacity) // NUM_BITS,
+    }
+
+
+def capacity(image, threshold=DEFAULT_THRESHOLD, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE, block_size=(BLOCK_WIDTH, BLOCK_HEIGHT), stable_edges=False):
+    """
+    Report the payload capacity of a cover image without embedding anything.
+
+    :param image: Path, PIL image or HxWx3 uint8 array of the cover
+    :param threshold: Threshold for edge detection
+    :param edge_bits: Bits per channel in edge blocks
+    :param non_edge_bits: Bits per channel in non-edge blocks
+    :param block_size: (width, height) of a block, or a single int for square blocks
+    :param stable_edges: Classify blocks on the bit planes above the embedded bits
+    :return: Dict as returned by ``capacity_report``
+    """
+    block_width, block_height = (block_size, block_size) if isinstance(block_size, int) else block_size
+    engine = StegoEngine(threshold, edge_bits, non_edge_bits, block_width, block_height, stable_edges=stable_edges)
+    return engine.capacity(image)
+
+
+def embed_symbols(pixels, indices, widths, symbols):
+    """
+    Write symbols into the low bits of the given slots with one masked scatter.
+
+    :param pixels: C-contiguous uint8 pixel array, modified in place
+    :param indices: Flat channel indices from ``build_slot_table``
+    :param widths: Bit width of every slot
+    :param symbols: Symbol for every slot, each narrower than its width
+    """
+    if not pixels.flags.c_contiguous:
+        raise ValueError("pixels must be a C-contiguous array")
+    flat = pixels.reshape(-1)
+    masks = slot_masks(widths)
+    flat[indices] = (flat[indices] & ~masks) | symbols
+
+
+def extract_symbols(pixels, indices, widths):
+    """
+    Read the low bits of the given slots with one gather.
+    """
+    return pixels.reshape(-1)[indices] & slot_masks(widths)
+
+
+def slot_masks(widths):
+    """
+    Low-bit mask for each slot width.
+    """
+    return ((np.uint16(1) << np.asarray(widths, dtype=np.uint16)) - 1).astype(np.uint8)
+
+
+class StegoEngine:
+    """
+    Shared block configuration and edge detection for the text and image stego classes.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, edge_bits=NUM_BITS_EDGE, non_edge_bits=NUM_BITS_NON_EDGE, block_width=BLOCK_WIDTH, block_height=BLOCK_HEIGHT, workers=1, executor="thread", cache=None, stable_edges=False, instrumentation=None, progress=None, cancel=None, key=None, ecc=ECC_NONE):
+        self.threshold = threshold
+        self.edge_bits = edge_bits
+        self.non_edge_bits = non_edge_bits
+        self.block_width = block_width
+        self.block_height = block_height
+        self.workers = workers  # Stripes embedded in parallel; None uses every core
+        self.executor = executor  # "thread" or "process" pool for parallel stripes
+        self.cache = cache  # Optional EdgeMapCache shared between calls and instances
+        # Classify on bit planes that embedding leaves untouched; always on with a key, whose
+        # slots lie anywhere in the image, so any reclassified block would break extraction
+        self.stable_edges = stable_edges or key is not None
+        self.instrumentation = instrumentation  # Optional Instrumentation collecting stage times and counters
+        self.progress = progress  # Optional progress(stage, done, total) called between chunks of block rows
+        self.cancel = cancel  # Optional CancelToken checked between chunks of block rows
+        self.key = key  # Optional secret; slots are then filled in a keyed pseudo-random order
+        self.ecc = ecc_scheme(ecc)  # ECC_* scheme (or its name) protecting payloads embedded with a header
+
+    def stage(self, name):
+        """
+        Context manager timing stage ``name``; a shared no-op while instrumentation is off.
+        """
+        if self.instrumentation is None:
+            return NO_STAGE
+        return self.instrumentation.stage(name)
+
+    def count(self, name, amount=1):
+        """
+        Increase counter ``name`` if instrumentation is on.
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.count(name, amount)
+
+    def chunked(self):
+        """
+        Whether work is split into chunks of block rows for progress reports and cancellation.
+        """
+        return self.progress is not None or self.cancel is not None
+
+    def checkpoint(self, stage, done, total):
+        """
+        Report progress of ``stage`` and stop if the job has been cancelled.
+
+        :raises Cancelled: If the cancellation token is set
+        """
+        if self.cancel is not None:
+            self.cancel.check()
+        if self.progress is not None:
+            self.progress(stage, done, total)
+
+    def load_cover(self, image):
+        """
+        ``load_pixels`` with the file decode and the RGB conversion timed as separate stages.
+        """
+        if isinstance(image, np.ndarray):
+            return image
+        if not isinstance(image, Image.Image):
+            with self.stage("decode"):
+                image = Image.open(image)
+                image.load()
+        with self.stage("convert"):
+            return load_pixels(image)
+
+    def save_image(self, image, target, format=None, **options):
+        """
+        Save an image or array returned by an embed or extract method, timed as the save stage.
+
+        :param target: File path or writable binary stream
+        :param format: Output format, see ``save_pixels``
+        :param options: Encoder options for ``save_pixels``, e.g. ``compress_level`` and ``strategy``
+        """
+        with self.stage("save"):
+            save_pixels(image, target, format, **options)
+
+    def cache_config(self):
+        """
+        Settings that, together with the pixels, determine edge maps and slot tables.
+        """
+        return self.threshold, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height, self.stable_edges
+
+    def plane_bits(self):
+        """
+        Low bit planes ignored by edge detection: the embedded bits in stable mode, else None.
+        """
+        return max(self.edge_bits, self.non_edge_bits) if self.stable_edges else None
+
+    def compute_edge_map(self, pixels):
+        """
+        Edge/non-edge grid for ``pixels`` using this instance's threshold and block size.
+
+        With ``stable_edges`` the bit planes that embedding writes are ignored, so the map
+        of a stego image equals the map of its cover. With a cache, covers seen before are
+        looked up by a hash of their pixels instead of being classified again.
+        """
+        with self.stage("edge_detection"):
+            if self.cache is None:
+                edge_map = self._classify(pixels)
+            else:
+                key = content_key("edge_map", pixels, self.cache_config())
+                entry = self.cache.get(key)
+                if entry is None:
+                    entry = self.cache.put(key, edge_map=self._classify(pixels))
+                edge_map = entry["edge_map"]
+
+        if self.instrumentation is not None:
+            edge_blocks = int(np.count_nonzero(edge_map))
+            self.count("blocks_scanned", edge_map.size)
+            self.count("edge_blocks", edge_blocks)
+            self.count("non_edge_blocks", edge_map.size - edge_blocks)
+        return edge_map
+
+    def _classify(self, pixels):
+        if not self.chunked():
+            return compute_edge_map(pixels, self.threshold, self.block_width, self.block_height, self.plane_bits())
+
+        # Each chunk keeps one pixel row below it, so it classifies as in the whole image
+        rows = edge_grid_shape(pixels.shape[0], pixels.shape[1], self.block_width, self.block_height)[0]
+        parts = []
+        for start in range(0, rows, CHUNK_BLOCK_ROWS):
+            self.checkpoint("edge_detection", start, rows)
+            stop = min(start + CHUNK_BLOCK_ROWS, rows)
+            chunk = pixels[start * self.block_height:stop * self.block_height + 1]
+            parts.append(compute_edge_map(chunk, self.threshold, self.block_width, self.block_height, self.plane_bits())[:stop - start])
+        self.checkpoint("edge_detection", rows, rows)
+        if not parts:
+            return compute_edge_map(pixels, self.threshold, self.block_width, self.block_height, self.plane_bits())
+        return np.concatenate(parts)
+
+    def block_capacities(self, edge_map, height, width):
+        """
+        Payload bits every block of an image with the given edge map can hold.
+        """
+        return block_capacities(edge_map, height, width, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height)
+
+    def capacity(self, image):
+        """
+        Capacity of a cover image (path, PIL image or array) with this instance's settings.
+        """
+        pixels = load_pixels(image)
+        height, width = pixels.shape[:2]
+        return capacity_report(self.compute_edge_map(pixels), height, width, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height)
+
+    def check_capacity(self, edge_map, height, width, payload_bytes):
+        """
+        Raise ``CapacityError`` if ``payload_bytes`` do not fit into the cover.
+        """
+        available = int(self.block_capacities(edge_map, height, width).sum())
+        needed = payload_bytes * NUM_BITS
+        if needed > available:
+            raise CapacityError(f"Payload needs {needed} bits but the cover holds only {available} bits")
+
+    def slot_table(self, edge_map, height, width, total_bits=None):
+        """
+        Slot indices and widths in embedding order, limited to ``total_bits`` if given.
+
+        Only the block rows the payload reaches are expanded, so short payloads do not pay
+        for a table of the whole image. With a cache the prefix sums of the block row
+        capacities are kept per edge map, never the table itself. With a key, slots are
+        generated in keyed order batch by batch until they hold ``total_bits``.
+        """
+        with self.stage("slot_table"):
+            return self._slot_table(edge_map, height, width, total_bits)
+
+    def _slot_table(self, edge_map, height, width, total_bits):
+        if self.key is not None:
+            if total_bits is None:
+                total_bits = int(self.block_capacities(edge_map, height, width).sum())
+            tables = list(self._chunk_slot_tables(edge_map, height, width, total_bits, "slot_table"))
+            if not tables:
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint8)
+            return np.concatenate([indices for _, indices, _ in tables]), np.concatenate([widths for _, _, widths in tables])
+
+        block_rows = None
+        if total_bits is not None:
+            row_ends = self.row_ends(edge_map, height, width)
+            block_rows = slice(0, int(np.searchsorted(row_ends, total_bits)) + 1)
+
+        indices, widths = build_slot_table(edge_map, height, width, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height, block_rows)
+        if total_bits is not None:
+            widths = clip_widths(widths, total_bits)
+            indices = indices[:len(widths)]
+        return indices, widths
+
+    def row_ends(self, edge_map, height, width):
+        """
+        Payload bits held by the block rows up to and including each one.
+
+        With a cache the prefix sums are stored per edge map.
+        """
+        if self.cache is None:
+            return np.cumsum(self.block_capacities(edge_map, height, width).sum(axis=1))
+        key = content_key("row_ends", edge_map, height, width, self.cache_config())
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = self.cache.put(key, row_ends=np.cumsum(self.block_capacities(edge_map, height, width).sum(axis=1)))
+        return entry["row_ends"]
+
+    def embed_payload(self, pixels, edge_map, payload):
+        """
+        Embed payload bytes into ``pixels`` in place along the slot table of ``edge_map``.
+
+        :param pixels: C-contiguous HxWx3 uint8 array
+        :param edge_map: Edge map of the cover before embedding
+        :param payload: Bytes or uint8 array to embed
+        :raises CapacityError: If the payload does not fit
+        """
+        payload = as_payload(payload)
+        self.count("payload_bytes_embedded", payload.size)
+        if self.workers != 1 and self.key is None:
+            from .parallel import embed_parallel
+            with self.stage("embed"):
+                return embed_parallel(self, pixels, edge_map, payload, self.workers, self.executor)
+
+        height, width = pixels.shape[:2]
+        self.check_capacity(edge_map, height, width, payload.size)
+        if self.chunked():
+            with self.stage("embed"):
+                return self._embed_chunked(pixels, edge_map, payload)
+
+        indices, widths = self.slot_table(edge_map, height, width, payload.size * NUM_BITS)
+        with self.stage("packing"):
+            symbols = pack_symbols(payload, widths)
+        with self.stage("embed"):
+            embed_symbols(pixels, indices, widths, symbols)
+        self.count("slots_written", len(widths))
+
+    def extract_payload(self, pixels, edge_map, length, prefix=False):
+        """
+        Extract ``length`` payload bytes from ``pixels`` along the slot table of ``edge_map``.
+
+        :param prefix: The embedded payload continues past ``length`` bytes, so the slot
+            holding the last requested bit was written at full width rather than narrowed
+        """
+        self.count("payload_bytes_extracted", length)
+        if self.workers != 1 and self.key is None and not prefix:
+            from .parallel import extract_parallel
+            with self.stage("extract"):
+                return extract_parallel(self, pixels, edge_map, length, self.workers, self.executor)
+
+        height, width = pixels.shape[:2]
+        self.check_capacity(edge_map, height, width, length)
+        # One extra byte of slots keeps the boundary slot unclipped, as no slot exceeds 8 bits
+        total_bits = (length + 1 if prefix else length) * NUM_BITS
+        if self.chunked():
+            with self.stage("extract"):
+                return self._extract_chunked(pixels, edge_map, total_bits)[:length]
+
+        indices, widths = self.slot_table(edge_map, height, width, total_bits)
+        with self.stage("extract"):
+            symbols = extract_symbols(pixels, indices, widths)
+        with self.stage("unpacking"):
+            payload = unpack_symbols(symbols, widths)[:length]
+        self.count("slots_read", len(widths))
+        return payload
+
+    def _slot_chunks(self, edge_map, height, width):
+        # Unclipped slot tables of chunks of block rows, or of keyed batches of channels
+        if self.key is not None:
+            from .permute import keyed_slot_batches
+            yield from keyed_slot_batches(edge_map, height, width, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height, self.key)
+            return
+        for start in range(0, edge_map.shape[0], CHUNK_BLOCK_ROWS):
+            block_rows = slice(start, start + CHUNK_BLOCK_ROWS)
+            yield build_slot_table(edge_map, height, width, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height, block_rows)
+
+    def _chunk_slot_tables(self, edge_map, height, width, total_bits, stage):
+        # Slot tables of successive chunks, clipped to total_bits
+        bit_offset = 0
+        chunks = self._slot_chunks(edge_map, height, width)
+        while bit_offset < total_bits:
+            indices, widths = next(chunks, (None, None))
+            if indices is None:
+                break
+            self.checkpoint(stage, bit_offset, total_bits)
+            widths = clip_widths(widths, total_bits - bit_offset)
+            yield bit_offset, indices[:len(widths)], widths
+            bit_offset += int(widths.sum(dtype=np.int64))
+        self.checkpoint(stage, total_bits, total_bits)
+
+    def _embed_chunked(self, pixels, edge_map, payload):
+        height, width = pixels.shape[:2]
+        for bit_offset, indices, widths in self._chunk_slot_tables(edge_map, height, width, payload.size * NUM_BITS, "embed"):
+            embed_symbols(pixels, indices, widths, pack_symbols(payload, widths, bit_offset))
+            self.count("slots_written", len(widths))
+
+    def _extract_chunked(self, pixels, edge_map, total_bits):
+        height, width = pixels.shape[:2]
+        symbols, widths = [], []
+        for _, chunk_indices, chunk_widths in self._chunk_slot_tables(edge_map, height, width, total_bits, "extract"):
+            symbols.append(extract_symbols(pixels, chunk_indices, chunk_widths))
+            widths.append(chunk_widths)
+            self.count("slots_read", len(chunk_widths))
+        if not widths:
+            return np.zeros(0, dtype=np.uint8)
+        return unpack_symbols(np.concatenate(symbols), np.concatenate(widths))
+
+    def edge_band(self, pixels, total_bits):
+        """
+        Top band of ``pixels`` and its edge map, tall enough to hold ``total_bits``.
+
+        The band is sized for the narrower block class, so it holds the bits whatever
+        the classification turns out to be. Blocks in the band are classified exactly as
+        in the full image because one extra pixel row is kept for the vertical gradient.
+        With a key the slots may lie anywhere, so the whole image is returned.
+        """
+        min_bits = min(self.edge_bits, self.non_edge_bits)
+        height, width = pixels.shape[:2]
+        if min_bits > 0 and self.key is None:
+            rows = -(-total_bits // (width * self.block_height * 3 * min_bits))
+            band_height = rows * self.block_height
+            if band_height < height:
+                edge_map = self.compute_edge_map(pixels[:band_height + 1])[:rows]
+                return pixels[:band_height], edge_map
+        return pixels, self.compute_edge_map(pixels)
+
+    def slot_range(self, edge_map, height, width, start_bit, end_bit, total_bits):
+        """
+        Slots holding payload bits ``start_bit`` to ``end_bit`` of a stream of ``total_bits``.
+
+        In raster order the block rows spanned by the range are found from the prefix sums
+        of the block capacities, so only those rows are expanded. With a key the batches
+        before the range are generated and skipped. Slots are narrowed as they were when
+        the whole stream was embedded.
+
+        :return: Tuple of (indices, widths, bits of the first slot that precede ``start_bit``)
+        :raises CapacityError: If the range lies beyond the capacity of the image
+        """
+        # One extra byte of slots keeps the boundary slot unclipped unless the stream ends there
+        limit = min(total_bits, end_bit + NUM_BITS)
+        with self.stage("slot_table"):
+            if self.key is not None:
+                base, indices, widths = None, [], []
+                for bit_offset, chunk_indices, chunk_widths in self._chunk_slot_tables(edge_map, height, width, limit, "extract"):
+                    if bit_offset + int(chunk_widths.sum(dtype=np.int64)) <= start_bit:
+                        continue
+                    base = bit_offset if base is None else base
+                    indices.append(chunk_indices)
+                    widths.append(chunk_widths)
+                indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+                widths = np.concatenate(widths) if widths else np.zeros(0, dtype=np.uint8)
+                base = base or 0
+            else:
+                row_ends = self.row_ends(edge_map, height, width)
+                first = int(np.searchsorted(row_ends, start_bit, "right"))
+                last = int(np.searchsorted(row_ends, end_bit - 1, "right"))
+                base = int(row_ends[first - 1]) if first else 0
+                indices, widths = build_slot_table(edge_map, height, width, self.edge_bits, self.non_edge_bits, self.block_width, self.block_height, slice(first, last + 1))
+                widths = clip_widths(widths, limit - base)
+                indices = indices[:len(widths)]
+
+        ends = np.cumsum(widths, dtype=np.int64) + base
+        if not ends.size or ends[-1] < end_bit:
+            raise CapacityError(f"Payload bits up to {end_bit} lie beyond the {int(ends[-1]) if ends.size else base} bits of the cover")
+        begin = int(np.searchsorted(ends, start_bit, "right"))
+        stop = int(np.searchsorted(ends, end_bit)) + 1
+        return indices[begin:stop], widths[begin:stop], start_bit - int(ends[begin] - widths[begin])
+
+    def extract_range(self, pixels, start, length, total):
+        """
+        Extract ``length`` bytes from byte ``start`` of an embedded stream of ``total`` bytes.
+
+        Only the slots of the range are gathered. Without a key only the top band of the
+        image that reaches the range is classified.
+
+        :return: uint8 array
+        :raises CapacityError: If the range lies beyond the capacity of the image
+        """
+        if length == 0:
+            return np.zeros(0, dtype=np.uint8)
+        self.count("payload_bytes_extracted", length)
+        band, edge_map = self.edge_band(pixels, (start + length) * NUM_BITS)
+        band_height, band_width = band.shape[:2]
+        indices, widths, skip = self.slot_range(edge_map, band_height, band_width, start * NUM_BITS, (start + length) * NUM_BITS, total * NUM_BITS)
+        with self.stage("extract"):
+            symbols = extract_symbols(band, indices, widths)
+        with self.stage("unpacking"):
+            payload = np.packbits(symbol_bits(symbols, widths)[skip:skip + length * NUM_BITS])
+        self.count("slots_read", len(widths))
+        return payload
+
+    def band_slot_table(self, band, band_height):
+        """
+        Slot table of one band from ``iter_bands``, classified with its lookahead row.
+
+        :raises ValueError: With a key, whose slot order spans the whole image
+        """
+        if self.key is not None:
+            raise ValueError("Keyed slot order spans the whole image and cannot be processed in bands")
+        rows = -(-band_height // self.block_height)
+        edge_map = self.compute_edge_map(band)[:rows]
+        return build_slot_table(edge_map, band_height, band.shape[1], self.edge_bits, self.non_edge_bits, self.block_width, self.block_height)
+
+    def embed_tiled(self, cover, output, payload, header=False, payload_type=PAYLOAD_BYTES, width=0, height=0, codec=CODEC_RAW, band_rows=BAND_BLOCK_ROWS):
+        """
+        Embed a payload into a cover one band of block rows at a time.
+
+        Only one band of the cover is held in memory; each band is written to ``output``
+        as soon as it is done, so memory-mapped covers larger than RAM can be used. The
+        result is identical to ``embed_payload`` on the whole image.
+
+        :param cover: HxWx3 uint8 array (usually memory-mapped) or a path for ``open_cover``
+        :param output: Writable array of the same shape or a path for ``create_output``
+        :param payload: Bytes or uint8 array to embed
+        :param header: Prefix the payload with a header of ``payload_type``, ``width``, ``height`` and ``codec``
+        :param band_rows: Block rows per band
+        :return: The output array
+        :raises CapacityError: If the payload does not fit, before ``output`` is created or written
+        """
+        if not isinstance(cover, np.ndarray):
+            cover = open_cover(cover)
+
+        payload = as_payload(payload)
+        if header:
+            payload = self.header_payload(payload_type, payload, width, height, codec)
+        total_bits = payload.size * NUM_BITS
+        self.count("payload_bytes_embedded", payload.size)
+
+        # Fail fast: classify bands until the payload is known to fit
+        available = 0
+        for _, band_height, band in iter_bands(cover, self.block_height, band_rows):
+            if available >= total_bits:
+                break
+            available += int(self.band_slot_table(band, band_height)[1].sum(dtype=np.int64))
+        if available < total_bits:
+            raise CapacityError(f"Payload needs {total_bits} bits but the cover holds only {available} bits")
+        if not isinstance(output, np.ndarray):
+            output = create_output(output, cover.shape)
+
+        bit_offset = 0
+        for y, band_height, band in iter_bands(cover, self.block_height, band_rows):
+            if bit_offset < total_bits:
+                indices, widths = self.band_slot_table(band, band_height)
+                widths = clip_widths(widths, total_bits - bit_offset)
+                indices = indices[:len(widths)]
+                with self.stage("packing"):
+                    symbols = pack_symbols(payload, widths, bit_offset)
+                with self.stage("embed"):
+                    embed_symbols(band, indices, widths, symbols)
+                self.count("slots_written", len(widths))
+                bit_offset += int(widths.sum(dtype=np.int64))
+            output[y:y + band_height] = band[:band_height]
+        return output
+
+    def extract_tiled(self, stego, length=None, band_rows=BAND_BLOCK_ROWS):
+        """
+        Extract a payload one band of block rows at a time, stopping once it is complete.
+
+        :param stego: HxWx3 uint8 array (usually memory-mapped) or a path for ``open_cover``
+        :param length: Payload length in bytes, or None to read it from the header
+        :param band_rows: Block rows per band
+        :return: Tuple of (header dict or None, payload uint8 array)
+        :raises CapacityError: If the image ends before ``length`` bytes
+        :raises HeaderError: If no length is given and the header is missing or corrupt
+        """
+        if not isinstance(stego, np.ndarray):
+            stego = open_cover(stego)
+
+        header = None
+        needed = (HEADER_SIZE if length is None else length) * NUM_BITS
+        symbols, widths = [], []
+        collected = 0
+        for _, band_height, band in iter_bands(stego, self.block_height, band_rows):
+            indices, band_widths = self.band_slot_table(band, band_height)
+            with self.stage("extract"):
+                symbols.append(extract_symbols(band, indices, band_widths))
+            self.count("slots_read", len(band_widths))
+            widths.append(band_widths)
+            collected += int(band_widths.sum(dtype=np.int64))
+
+            if length is None and header is None and collected >= needed:
+                header = parse_header(unpack_symbols(np.concatenate(symbols), np.concatenate(widths))[:HEADER_SIZE])
+                needed += header["length"] * NUM_BITS
+            if collected >= needed:
+                break
+        else:
+            if length is None and header is None:
+                raise HeaderError("Image is too small to carry a payload header")
+            raise CapacityError(f"Payload needs {needed} bits but the image holds only {collected} bits")
+
+        # The final slot may have been written narrower than it was read
+        widths = clip_widths(np.concatenate(widths), needed)
+        symbols = np.concatenate(symbols)[:len(widths)] & slot_masks(widths)
+        data = unpack_symbols(symbols, widths)[:needed // NUM_BITS]
+        self.count("payload_bytes_extracted", data.size)
+        if header is None:
+            return None, data
+        return header, self.open_payload(header, data[HEADER_SIZE:])
+
+    def embed_stream(self, cover, source, payload_type=PAYLOAD_BYTES, band_rows=BAND_BLOCK_ROWS):
+        """
+        Embed a header and a payload read on demand from a file-like object or byte chunks.
+
+        Payload memory stays at one band whatever the stream length; see
+        ``stego.streaming.embed_stream``.
+
+        :param cover: Writable HxWx3 uint8 array, modified in place, or a path to load
+        :param source: Binary file-like object or iterable of byte chunks
+        :return: The stego pixel array
+        :raises CapacityError: If the stream does not fit into the cover
+        """
+        from .streaming import embed_stream
+        pixels = self.load_cover(cover)
+        embed_stream(self, pixels, source, payload_type, band_rows)
+        return pixels
+
+    def iter_payload(self, stego, payload_type=None, band_rows=BAND_BLOCK_ROWS):
+        """
+        Yield a payload embedded with a header in byte chunks as the block rows are decoded.
+
+        Parameters recorded by ``embed_auto`` take precedence over this engine's.
+
+        :param stego: HxWx3 uint8 array or a path to load
+        :raises HeaderError: If the header is missing, of another type, or the checksum fails
+        """
+        from .streaming import iter_payload
+        pixels = self.load_cover(stego)
+        engine, _ = self.recorded_engine(pixels)
+        if engine is not self:
+            yield from engine.iter_payload(pixels, payload_type, band_rows)
+            return
+
+        header = self.read_header(pixels)
+        if payload_type is not None and header["payload_type"] != payload_type:
+            raise HeaderError(f"Embedded payload has type {header['payload_type']}, expected {payload_type}")
+        yield from iter_payload(self, pixels, header, band_rows)
+
+    def extract_stream(self, stego, writable, payload_type=None, band_rows=BAND_BLOCK_ROWS):
+        """
+        Write a payload embedded with a header to ``writable`` one band at a time.
+
+        Parameters recorded by ``embed_auto`` take precedence over this engine's.
+
+        :param stego: HxWx3 uint8 array or a path to load
+        :param writable: Object with a ``write`` method taking bytes
+        :return: The header dict
+        :raises HeaderError: If the header is missing, of another type, or the checksum fails
+        """
+        from .streaming import extract_stream
+        pixels = self.load_cover(stego)
+        engine, _ = self.recorded_engine(pixels)
+        return extract_stream(engine, pixels, writable, payload_type, band_rows)
+
+    def read_header(self, pixels):
+        """
+        Read and validate the payload header from the first slots of ``pixels``.
+
+        Only the magic is read before rejecting an image, so covers without a payload
+        are dismissed after a handful of pixels.
+
+        :raises HeaderError: If no valid header is present
+        """
+        band, edge_map = self.edge_band(pixels, HEADER_SIZE * NUM_BITS)
+        try:
+            if not has_magic(self.extract_payload(band, edge_map, len(MAGIC), prefix=True)):
+                raise HeaderError("Image does not carry an embedded payload header")
+            return parse_header(self.extract_payload(band, edge_map, HEADER_SIZE, prefix=True))
+        except CapacityError:
+            raise HeaderError("Image is too small to carry a payload header")
+
+    def embed_with_header(self, pixels, edge_map, payload_type, payload, width=0, height=0, codec=CODEC_RAW):
+        """
+        Embed a header describing ``payload`` followed by the payload itself.
+
+        ``payload`` is embedded as given; ``codec`` records how it was encoded, see
+        ``stego.codecs``.
+        """
+        self.embed_payload(pixels, edge_map, self.header_payload(payload_type, payload, width, height, codec))
+
+    def header_payload(self, payload_type, payload, width=0, height=0, codec=CODEC_RAW):
+        """
+        Header and payload as embedded, with the payload protected by this engine's ECC scheme.
+
+        :return: uint8 array
+        """
+        payload = as_payload(payload)
+        if self.ecc == ECC_NONE:
+            header = pack_header(payload_type, payload, width, height, codec)
+        else:
+            with self.stage("ecc"):
+                coded = ecc_encode(self.ecc, payload)
+            header = pack_header_values(payload_type, coded.size, zlib.crc32(payload), width, height, codec, self.ecc)
+            payload = coded
+        return np.concatenate([np.frombuffer(header, dtype=np.uint8), payload])
+
+    def open_payload(self, header, payload):
+        """
+        Verify a payload read after ``header``, correcting it first if it carries an ECC scheme.
+
+        For ECC payloads the ``corrected`` and ``uncorrectable`` counts of ``ecc_decode``
+        are added to ``header``.
+
+        :return: The payload as originally embedded
+        :raises HeaderError: If the payload is truncated or fails its checksum
+        """
+        if header["ecc"] == ECC_NONE:
+            verify_payload(header, payload)
+            return payload
+        with self.stage("ecc"):
+            payload, corrected, uncorrectable = ecc_decode(header["ecc"], payload)
+        header.update(corrected=corrected, uncorrectable=uncorrectable)
+        self.count("ecc_corrected", corrected)
+        self.count("ecc_uncorrectable", uncorrectable)
+        if zlib.crc32(payload) != header["crc32"]:
+            raise HeaderError(f"Embedded payload failed its checksum with {uncorrectable} uncorrectable ECC blocks")
+        return payload
+
+    def auto_params(self, pixels, payload_bytes):
+        """
+        Threshold and bit split for this block size that fit ``payload_bytes`` with the
+        lowest expected MSE, see ``stego.autotune.auto_params``.
+        """
+        from .autotune import auto_params
+        with self.stage("edge_detection"):
+            return auto_params(pixels, payload_bytes, self.block_width, self.block_height)
+
+    def tuned(self, params):
+        """
+        Copy of this engine using the threshold and bit split in ``params``, classifying in stable mode.
+        """
+        engine = copy.copy(self)
+        engine.threshold = params["threshold"]
+        engine.edge_bits = params["edge_bits"]
+        engine.non_edge_bits = params["non_edge_bits"]
+        engine.block_width = params["block_width"]
+        engine.block_height = params["block_height"]
+        engine.stable_edges = True
+        return engine
+
+    def embed_auto(self, pixels, payload_type, payload, width=0, height=0, codec=CODEC_RAW):
+        """
+        ``embed_with_header`` with parameters chosen by ``auto_params`` for this cover and payload.
+
+        The chosen parameters are recorded in the image, so ``extract_with_header`` finds
+        the payload whatever the configuration of the extracting engine.
+
+        :param pixels: C-contiguous, writable HxWx3 uint8 array, modified in place
+        :return: The parameter dict from ``auto_params``
+        :raises CapacityError: If no parameters hold the payload
+        :raises ValueError: If this engine has a key
+        """
+        from .autotune import write_params
+        if self.key is not None:
+            raise ValueError("Automatic parameters keep the last block row free, which keyed slot order does not")
+        payload = as_payload(payload)
+        params = self.auto_params(pixels, HEADER_SIZE + ecc_length(self.ecc, payload.size))
+        engine = self.tuned(params)
+        engine.embed_with_header(pixels, engine.compute_edge_map(pixels), payload_type, payload, width, height, codec)
+        write_params(pixels, params)
+        return params
+
+    def recorded_engine(self, pixels):
+        """
+        Engine matching the parameters ``embed_auto`` recorded in ``pixels``.
+
+        :return: Tuple of (this engine or a tuned copy, recorded parameter dict or None)
+        """
+        from .autotune import PARAM_KEYS, read_params
+        params = read_params(pixels)
+        if params is None or (self.stable_edges and all(getattr(self, key) == params[key] for key in PARAM_KEYS)):
+            return self, params
+        return self.tuned(params), params
+
+    def update_payload(self, pixels, payload_type, payload, width=0, height=0, codec=CODEC_RAW):
+        """
+        Replace the payload embedded with a header, writing only the slots whose symbols change.
+
+        The edge map of the stego image is reused, and the symbols it currently holds are
+        compared with those of the new header and payload, so a small edit of an
+        uncompressed payload becomes a small scatter. Slots past a shorter new payload
+        keep the tail of the old one.
+
+        :param pixels: C-contiguous, writable HxWx3 uint8 stego array, modified in place
+        :return: Dict with the slots compared, slots written and pixels changed
+        :raises CapacityError: If the new payload does not fit
+        :raises ValueError: Without stable edges or recorded parameters, as rewritten
+            slots could then move blocks across the threshold
+        """
+        engine, params = self.recorded_engine(pixels)
+        if engine is not self:
+            return engine.update_payload(pixels, payload_type, payload, width, height, codec)
+        if params is None and not self.stable_edges:
+            raise ValueError("Updating a payload needs stable_edges=True or automatic parameters, so the edge map cannot change")
+
+        data = self.header_payload(payload_type, payload, width, height, codec)
+        self.count("payload_bytes_embedded", data.size)
+        image_height, image_width = pixels.shape[:2]
+        edge_map = self.compute_edge_map(pixels)
+        capacities = self.block_capacities(edge_map, image_height, image_width)
+        if params is not None:
+            capacities = capacities[:-1]  # The last block row holds the parameter record
+        available = int(capacities.sum())
+        if data.size * NUM_BITS > available:
+            raise CapacityError(f"Payload needs {data.size * NUM_BITS} bits but the cover holds only {available} bits")
+
+        indices, widths = self.slot_table(edge_map, image_height, image_width, data.size * NUM_BITS)
+        with self.stage("packing"):
+            symbols = pack_symbols(data, widths)
+        with self.stage("embed"):
+            changed = np.flatnonzero(extract_symbols(pixels, indices, widths) != symbols)
+            embed_symbols(pixels, indices[changed], widths[changed], symbols[changed])
+        self.count("slots_written", changed.size)
+        return {
+            "slots_compared": int(widths.size),
+            "slots_written": int(changed.size),
+            "pixels_changed": int(np.unique(indices[changed] // 3).size),
+        }
+
+    def extract_with_header(self, pixels, payload_type=None):
+        """
+        Extract a payload embedded with ``embed_with_header``, without knowing its length.
+
+        Parameters recorded by ``embed_auto`` take precedence over this engine's.
+        Only the block rows covered by the header and payload are read.
+
+        :param pixels: HxWx3 uint8 array of the stego image
+        :param payload_type: Expected ``PAYLOAD_*`` type, or None to accept any
+        :return: Tuple of (header dict, payload uint8 array); for ECC payloads the header
+            also holds the ``corrected`` and ``uncorrectable`` counts
+        :raises HeaderError: If the header is missing, of another type, or the checksum fails
+        """
+        engine, _ = self.recorded_engine(pixels)
+        if engine is not self:
+            return engine.extract_with_header(pixels, payload_type)
+
+        header = self.read_header(pixels)
+        if payload_type is not None and header["payload_type"] != payload_type:
+            raise HeaderError(f"Embedded payload has type {header['payload_type']}, expected {payload_type}")
+
+        total = HEADER_SIZE + header["length"]
+        band, edge_map = self.edge_band(pixels, total * NUM_BITS)
+        try:
+            data = self.extract_payload(band, edge_map, total)
+        except CapacityError:
+            raise HeaderError("Header length exceeds the capacity of the image")
+        return header, self.open_payload(header, data[HEADER_SIZE:])
+
+    def embed_container(self, pixels, edge_map, entries):
+        """
+        Embed several named payloads behind a directory, each readable on its own.
+
+        :param edge_map: Edge map of the cover before embedding
+        :param entries: Dicts as taken by ``stego.container.pack_container``
+        :return: List of directory entry dicts
+        :raises ValueError: If this engine has an ECC scheme
+        """
+        from .container import pack_container
+        if self.ecc != ECC_NONE:
+            raise ValueError("Container entries are read on their own, which ECC blocks spanning the payload do not allow")
+        data, directory = pack_container(entries)
+        self.embed_with_header(pixels, edge_map, PAYLOAD_CONTAINER, data)
+        return directory
+
+    def read_directory(self, pixels):
+        """
+        Read the directory of a container embedded with ``embed_container``.
+
+        Only the header and directory bytes are extracted, not the entries.
+
+        :return: List of directory entry dicts
+        :raises HeaderError: If the image carries no container or its directory is corrupted
+        """
+        from .container import DIRECTORY_SIZE, parse_directory_head, parse_entries
+        engine, _ = self.recorded_engine(pixels)
+        if engine is not self:
+            return engine.read_directory(pixels)
+
+        header = self.read_header(pixels)
+        if header["payload_type"] != PAYLOAD_CONTAINER:
+            raise HeaderError(f"Embedded payload has type {header['payload_type']}, expected a container")
+        total = HEADER_SIZE + header["length"]
+        if total < HEADER_SIZE + DIRECTORY_SIZE:
+            raise HeaderError("Container is shorter than its directory")
+        try:
+            head = parse_directory_head(self.extract_range(pixels, HEADER_SIZE, DIRECTORY_SIZE, total))
+            if HEADER_SIZE + DIRECTORY_SIZE + head["size"] > total:
+                raise HeaderError("Container directory exceeds the container")
+            return parse_entries(head, self.extract_range(pixels, HEADER_SIZE + DIRECTORY_SIZE, head["size"], total))
+        except CapacityError:
+            raise HeaderError("Header length exceeds the capacity of the image")
+
+    def extract_entry(self, pixels, name, directory=None):
+        """
+        Extract one named entry of a container, gathering only the slots it occupies.
+
+        :param directory: Directory from ``read_directory``, read from ``pixels`` if omitted
+        :return: Tuple of (directory entry dict, payload uint8 array)
+        :raises KeyError: If the container has no entry called ``name``
+        :raises HeaderError: If the entry fails its checksum
+        """
+        from .container import find_entry, verify_entry
+        engine, _ = self.recorded_engine(pixels)
+        if engine is not self:
+            return engine.extract_entry(pixels, name, directory)
+
+        if directory is None:
+            directory = self.read_directory(pixels)
+        entry = find_entry(directory, name)
+        last = max(item["offset"] + item["length"] for item in directory)
+        try:
+            payload = self.extract_range(pixels, entry["offset"], entry["length"], last)
+        except CapacityError:
+            raise HeaderError(f"Container entry {name!r} exceeds the capacity of the image")
+        verify_entry(entry, payload)
+        return entry, payload
+
+    def is_edge_block(self, pixels, x, y):
+        """
+        Perform edge detection on the block of pixels.
+        """
+        if x + self.block_width >= pixels.shape[1] or y + self.block_height >= pixels.shape[0]:
+            return False  # Treat blocks at the edges as non-edge blocks
+
+        # Calculate gradient magnitude for edge detection on the R channel
+        gx = pixels[y:y + self.block_height, x + 1:x + self.block_width + 1, 0] - pixels[y:y + self.block_height, x:x + self.block_width, 0]
+        gy = pixels[y + 1:y + self.block_height + 1, x:x + self.block_width, 0] - pixels[y:y + self.block_height, x:x + self.block_width, 0]
+        gradient_magnitude = np.sqrt(gx**2 + gy**2)
+
+        return np.any(gradient_magnitude > self.threshold)
+
+    def embed_bits(self, pixels, x, y, bits, channel):
+        """
+        Embed bits into the pixel value.
+        """
+        current_value = pixels[y, x, channel]
+        bits_value = int(bits, 2)
+        mask = (1 << len(bits)) - 1
+        new_value = (current_value & (~mask & 0xFF)) | bits_value
+        pixels[y, x, channel] = new_value
+
+    def extract_bits(self, pixels, x, y, num_bits, channel):
+        """
+        Extract bits from the pixel value.
+        """
+        value = pixels[y, x, channel] & ((1 << num_bits) - 1)
+        return f"{value:0{num_bits}b}"
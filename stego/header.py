@@ -0,0 +1,95 @@
+import struct
+import zlib
+
+MAGIC = b"ES"  # Marks an image carrying an edge-stego header
+VERSION = 2
+ECC_VERSION = 3  # Written instead of VERSION for payloads protected by an ECC scheme
+SUPPORTED_VERSIONS = (1, 2, 3)  # Version 1 headers have no codec and store text as Latin-1
+HEADER_FORMAT = ">2sBBIHHI"  # magic, version, codec << 4 | [ecc << 2 |] payload type, length, width, height, crc32
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAX_DIMENSION = 0xFFFF  # Largest hidden image width or height a header can record
+MAX_LENGTH = 0xFFFFFFFF  # Largest payload length in bytes a header can record
+
+PAYLOAD_BYTES = 0  # Opaque bytes
+PAYLOAD_TEXT = 1  # UTF-8 text (Latin-1 in version 1 headers)
+PAYLOAD_IMAGE = 2  # RGB image of width x height pixels
+PAYLOAD_CONTAINER = 3  # Directory of named entries, see ``stego.container``
+
+
+class HeaderError(ValueError):
+    """
+    Raised when an image carries no valid header or the payload fails its checksum.
+    """
+
+
+def pack_header(payload_type, payload, width=0, height=0, codec=0):
+    """
+    Build the header that precedes a payload in the first slots of the cover.
+
+    :param payload_type: One of the ``PAYLOAD_*`` constants
+    :param payload: Payload bytes as embedded, used for the length and checksum
+    :param width: Hidden image width for ``PAYLOAD_IMAGE``
+    :param height: Hidden image height for ``PAYLOAD_IMAGE``
+    :param codec: ``CODEC_*`` constant the payload was encoded with
+    :return: ``HEADER_SIZE`` bytes
+    """
+    return pack_header_values(payload_type, len(payload), zlib.crc32(payload), width, height, codec)
+
+
+def pack_header_values(payload_type, length, crc32, width=0, height=0, codec=0, ecc=0):
+    """
+    Build a header from a payload length and checksum computed elsewhere, e.g. while streaming.
+
+    With an ``ecc`` scheme, ``length`` counts the embedded bytes including the code and
+    ``crc32`` covers the payload before it was encoded.
+
+    :raises ValueError: If the width, height or length exceeds what the header can record
+    """
+    check_dimensions(width, height)
+    if not 0 <= length <= MAX_LENGTH:
+        raise ValueError(f"Payload of {length} bytes exceeds the header limit of {MAX_LENGTH} bytes")
+    if ecc:
+        return struct.pack(HEADER_FORMAT, MAGIC, ECC_VERSION, codec << 4 | ecc << 2 | payload_type, length, width, height, crc32)
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, codec << 4 | payload_type, length, width, height, crc32)
+
+
+def check_dimensions(width, height):
+    """
+    :raises ValueError: If a hidden image is too large for the width and height fields of a header
+    """
+    if not (0 <= width <= MAX_DIMENSION and 0 <= height <= MAX_DIMENSION):
+        raise ValueError(f"Hidden image of {width}x{height} pixels exceeds the header limit of {MAX_DIMENSION} pixels per side")
+
+
+def has_magic(data):
+    """
+    Whether ``data`` starts with the header magic; cheap enough to reject most covers.
+    """
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+
+def parse_header(data):
+    """
+    Decode a header read from the first ``HEADER_SIZE`` payload bytes.
+
+    :return: Dict with version, payload_type, codec, ecc, length, width, height and crc32
+    :raises HeaderError: If the magic or version does not match
+    """
+    if len(data) < HEADER_SIZE or not has_magic(data):
+        raise HeaderError("Image does not carry an embedded payload header")
+    magic, version, kind, length, width, height, crc = struct.unpack(HEADER_FORMAT, bytes(data[:HEADER_SIZE]))
+    if version not in SUPPORTED_VERSIONS:
+        raise HeaderError(f"Unsupported header version {version}")
+    ecc = (kind >> 2) & 0x03 if version >= ECC_VERSION else 0
+    payload_type = kind & (0x03 if version >= ECC_VERSION else 0x0F)
+    return {"version": version, "payload_type": payload_type, "codec": kind >> 4, "ecc": ecc, "length": length, "width": width, "height": height, "crc32": crc}
+
+
+def verify_payload(header, payload):
+    """
+    Check a payload against the length and checksum recorded in its header.
+
+    :raises HeaderError: If the payload is truncated or corrupted
+    """
+    if len(payload) != header["length"] or zlib.crc32(payload) != header["crc32"]:
+        raise HeaderError("Embedded payload failed its checksum")
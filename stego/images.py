@@ -0,0 +1,127 @@
+import io
+import os
+import zlib
+
+from PIL import Image
+import numpy as np
+
+SAVE_FORMATS = {".png": "PNG", ".webp": "WEBP", ".tif": "TIFF", ".tiff": "TIFF", ".bmp": "BMP", ".npy": "NPY"}  # By file extension
+PNG_STRATEGIES = {
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "huffman": zlib.Z_HUFFMAN_ONLY,  # No string matching, fastest
+    "rle": zlib.Z_RLE,
+    "fixed": zlib.Z_FIXED,
+}
+FAST_PNG_LEVEL = 1  # zlib level trading a larger file for a much faster encode
+
+
+def load_pixels(image):
+    """
+    Load a cover as an HxWx3 uint8 RGB array.
+
+    :param image: Path, PIL image or array; arrays are returned as they are and
+        ``.npy`` files written by ``save_pixels`` are loaded without decoding
+    :return: NumPy array of RGB pixels
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, (str, os.PathLike)) and os.fspath(image).lower().endswith(".npy"):
+        return np.load(image)
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")  # convert() copies even when the mode already matches
+    return np.array(image)
+
+
+def decode_pixels(data):
+    """
+    Decode an encoded image held in memory (PNG, BMP, TIFF, ...) into an RGB array.
+
+    :param data: Bytes, bytearray or memoryview with the encoded file
+    :return: Writable HxWx3 uint8 array
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return load_pixels(image)
+
+
+def encode_pixels(pixels, format="PNG", **options):
+    """
+    Encode an RGB array into image file bytes without touching the filesystem.
+
+    :param pixels: HxWx3 uint8 array
+    :param format: Format name for ``save_pixels``; use a lossless one for stego images
+    :param options: Encoder options for ``save_pixels``
+    :return: Encoded bytes
+    """
+    buffer = io.BytesIO()
+    save_pixels(pixels, buffer, format, **options)
+    return buffer.getvalue()
+
+
+def save_pixels(image, target, format=None, compress_level=None, strategy=None, optimize=False, **params):
+    """
+    Write an image losslessly to a path or a writable binary stream.
+
+    PNG is encoded with the given zlib level and strategy and without Pillow's
+    optimize pass unless asked for; WebP is always lossless and TIFF uncompressed
+    unless a level is given. NPY writes the raw array for pipeline hops that are
+    read back with ``load_pixels``, skipping encoding altogether.
+
+    :param image: HxWx3 uint8 array or PIL image
+    :param target: File path or object with a ``write`` method
+    :param format: PNG, WEBP, TIFF, BMP, NPY or another Pillow format; inferred from the
+        extension of a path and PNG for streams when omitted
+    :param compress_level: zlib level 0-9 for PNG, WebP effort 0-6, deflate for TIFF if non-zero
+    :param strategy: PNG zlib strategy, one of ``PNG_STRATEGIES``
+    :param optimize: Let Pillow search for the smallest PNG, which is slow
+    :param params: Extra keyword arguments for ``Image.save``
+    :raises ValueError: If the strategy is unknown
+    """
+    if format is None:
+        extension = os.path.splitext(os.fspath(target))[1].lower() if isinstance(target, (str, os.PathLike)) else ""
+        format = SAVE_FORMATS.get(extension, "PNG")
+    format = format.upper()
+
+    if format == "NPY":
+        np.save(target, np.asarray(image), allow_pickle=False)
+        return
+
+    if format == "PNG":
+        if strategy is not None and strategy not in PNG_STRATEGIES:
+            raise ValueError(f"Unknown PNG strategy {strategy!r}, expected one of {', '.join(PNG_STRATEGIES)}")
+        params.setdefault("optimize", optimize)
+        if compress_level is not None:
+            params.setdefault("compress_level", compress_level)
+        if strategy is not None:
+            params.setdefault("compress_type", PNG_STRATEGIES[strategy])
+    elif format == "WEBP":
+        params.setdefault("lossless", True)
+        if compress_level is not None:
+            params.setdefault("method", min(compress_level, 6))
+    elif format == "TIFF":
+        params.setdefault("compression", "tiff_adobe_deflate" if compress_level else "raw")
+
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    image.save(target, format=format, **params)
+
+
+def as_cover(pixels, in_place=False):
+    """
+    Check that ``pixels`` can be embedded into and return the array to modify.
+
+    :param pixels: HxWx3 uint8 array
+    :param in_place: Return ``pixels`` itself so embedding modifies the caller's array;
+        otherwise a copy is returned
+    :return: C-contiguous, writable HxWx3 uint8 array
+    :raises ValueError: If the array has the wrong shape or dtype, or cannot be modified in place
+    """
+    if not isinstance(pixels, np.ndarray) or pixels.dtype != np.uint8 or pixels.ndim != 3 or pixels.shape[2] != 3:
+        raise ValueError("Cover must be an HxWx3 uint8 array")
+    if not in_place:
+        return np.array(pixels, order="C")
+    if not pixels.flags.c_contiguous or not pixels.flags.writeable:
+        raise ValueError("In-place embedding needs a C-contiguous, writable array")
+    return pixels
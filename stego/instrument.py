@@ -0,0 +1,101 @@
+from contextlib import nullcontext
+import threading
+import time
+
+STAGES = ("decode", "convert", "edge_detection", "compression", "ecc", "slot_table", "packing", "embed", "extract", "unpacking", "save")
+COUNTERS = ("blocks_scanned", "edge_blocks", "non_edge_blocks", "slots_written", "slots_read", "payload_bytes_embedded", "payload_bytes_extracted", "ecc_corrected", "ecc_uncorrectable")
+NO_STAGE = nullcontext()  # Shared no-op context used while instrumentation is disabled
+
+
+class Instrumentation:
+    """
+    Wall time per stage and event counters collected by a ``StegoEngine``.
+
+    Totals accumulate over every call until ``reset``; one instance may be shared by
+    several engines and threads.
+    """
+
+    def __init__(self, callback=None):
+        """
+        :param callback: Optional ``callback(stage, seconds)`` called as each stage ends
+        """
+        self.callback = callback
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Zero every stage time and counter.
+        """
+        with self.lock:
+            self.seconds = dict.fromkeys(STAGES, 0.0)
+            self.calls = dict.fromkeys(STAGES, 0)
+            self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def stage(self, name):
+        """
+        Context manager timing one run of stage ``name``.
+        """
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """
+        Add ``seconds`` of wall time to stage ``name``.
+        """
+        with self.lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.callback is not None:
+            self.callback(name, seconds)
+
+    def count(self, name, amount=1):
+        """
+        Increase counter ``name`` by ``amount``.
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + int(amount)
+
+    def as_dict(self):
+        """
+        Snapshot of the collected metrics.
+
+        :return: Dict with ``stages`` (name to seconds and calls) and ``counters``
+        """
+        with self.lock:
+            stages = {name: {"seconds": self.seconds[name], "calls": self.calls[name]} for name in self.seconds}
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def prometheus(self, prefix="stego"):
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.as_dict()
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Wall time spent per stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {stage["seconds"]:.9f}' for name, stage in snapshot["stages"].items()]
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Completed runs per stage.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {stage["calls"]}' for name, stage in snapshot["stages"].items()]
+        for name, value in snapshot["counters"].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
@@ -0,0 +1,196 @@
+import json
+import math
+
+import numpy as np
+
+from .images import load_pixels
+
+CHANNELS = ("R", "G", "B")
+PEAK = 255  # Largest channel value, for PSNR and the SSIM constants
+SSIM_WINDOW = 7  # Side of the square window SSIM statistics are averaged over
+SSIM_K1 = 0.01
+SSIM_K2 = 0.03
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])  # ITU-R 601 luma, as Pillow's "L" mode
+BAND_ROWS = 512  # Pixel rows processed at once, bounding temporary float arrays
+KL_EPSILON = 1e-10  # Added to empty histogram bins so KL divergence stays finite
+
+
+def _bands(height, band_rows=BAND_ROWS):
+    return ((top, min(top + band_rows, height)) for top in range(0, height, band_rows))
+
+
+def _check_shapes(cover, stego):
+    if cover.shape != stego.shape:
+        raise ValueError(f"Images differ in shape: {cover.shape} and {stego.shape}")
+
+
+def squared_error(cover, stego):
+    """
+    Sum of squared channel differences between two arrays of the same shape.
+    """
+    _check_shapes(cover, stego)
+    total = 0
+    for top, bottom in _bands(cover.shape[0]):
+        difference = cover[top:bottom].astype(np.int32) - stego[top:bottom]
+        total += int(np.square(difference).sum(dtype=np.int64))
+    return total
+
+
+def mse(cover, stego):
+    """
+    Mean squared error over every channel of two HxWx3 uint8 arrays.
+    """
+    return squared_error(cover, stego) / cover.size
+
+
+def psnr(cover, stego):
+    """
+    Peak signal-to-noise ratio in dB; infinite for identical images.
+    """
+    return _psnr(mse(cover, stego))
+
+
+def _psnr(error):
+    return math.inf if error == 0 else 10 * math.log10(PEAK * PEAK / error)
+
+
+def _box_mean(values, size):
+    # Mean of every size x size window through cumulative sums along both axes
+    sums = np.cumsum(values, axis=0)
+    sums = np.concatenate([sums[size - 1:size], sums[size:] - sums[:-size]])
+    sums = np.cumsum(sums, axis=1)
+    sums = np.concatenate([sums[:, size - 1:size], sums[:, size:] - sums[:, :-size]], axis=1)
+    return sums / (size * size)
+
+
+def ssim(cover, stego, window=SSIM_WINDOW):
+    """
+    Mean structural similarity of the luma of two images over square windows.
+
+    Windows are uniform and every fully contained position is averaged. The image is
+    processed in bands of rows so temporary arrays stay small for large covers.
+
+    :raises ValueError: If the images differ in shape or are smaller than the window
+    """
+    _check_shapes(cover, stego)
+    height, width = cover.shape[:2]
+    if height < window or width < window:
+        raise ValueError(f"Images must be at least {window}x{window} pixels for SSIM")
+
+    c1 = (SSIM_K1 * PEAK) ** 2
+    c2 = (SSIM_K2 * PEAK) ** 2
+    total = 0.0
+    for top, bottom in _bands(height - window + 1):
+        rows = slice(top, bottom + window - 1)
+        x = cover[rows] @ LUMA_WEIGHTS
+        y = stego[rows] @ LUMA_WEIGHTS
+        mean_x = _box_mean(x, window)
+        mean_y = _box_mean(y, window)
+        var_x = _box_mean(x * x, window) - mean_x * mean_x
+        var_y = _box_mean(y * y, window) - mean_y * mean_y
+        cov_xy = _box_mean(x * y, window) - mean_x * mean_y
+        similarity = ((2 * mean_x * mean_y + c1) * (2 * cov_xy + c2)) / ((mean_x * mean_x + mean_y * mean_y + c1) * (var_x + var_y + c2))
+        total += float(similarity.sum())
+    return total / ((height - window + 1) * (width - window + 1))
+
+
+def histograms(pixels):
+    """
+    Per-channel value counts of an HxWx3 uint8 array.
+
+    :return: int64 array of shape (3, 256)
+    """
+    counts = np.zeros((3, 256), dtype=np.int64)
+    for top, bottom in _bands(pixels.shape[0]):
+        for channel in range(3):
+            counts[channel] += np.bincount(pixels[top:bottom, :, channel].ravel(), minlength=256)
+    return counts
+
+
+def _distributions(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    return counts / np.maximum(counts.sum(axis=-1, keepdims=True), 1)
+
+
+def chi_square(counts, other):
+    """
+    Symmetric chi-square distance between histograms, per channel.
+
+    Both are normalised first, so the distance lies between 0 and 1.
+
+    :return: Array with one distance per histogram row
+    """
+    p = _distributions(counts)
+    q = _distributions(other)
+    total = p + q
+    terms = np.divide((p - q) ** 2, total, out=np.zeros_like(total), where=total > 0)
+    return terms.sum(axis=-1) / 2
+
+
+def kl_divergence(counts, other, epsilon=KL_EPSILON):
+    """
+    Kullback-Leibler divergence of ``other`` from ``counts`` in nats, per channel.
+
+    :return: Array with one divergence per histogram row
+    """
+    p = _distributions(counts) + epsilon
+    q = _distributions(other) + epsilon
+    p /= p.sum(axis=-1, keepdims=True)
+    q /= q.sum(axis=-1, keepdims=True)
+    return (p * np.log(p / q)).sum(axis=-1)
+
+
+def quality_report(cover, stego, structural=True):
+    """
+    Distortion of a stego image relative to its cover, ready for ``json.dumps``.
+
+    :param cover: HxWx3 uint8 array or a path to load
+    :param stego: HxWx3 uint8 array or a path to load
+    :param structural: Also compute SSIM, the most expensive metric
+    :return: Dict with mse, psnr (None for identical images), ssim and per-channel
+        chi_square and kl_divergence of the histograms
+    """
+    cover = load_pixels(cover)
+    stego = load_pixels(stego)
+    error = mse(cover, stego)
+    cover_counts = histograms(cover)
+    stego_counts = histograms(stego)
+    report = {
+        "width": cover.shape[1],
+        "height": cover.shape[0],
+        "mse": error,
+        "psnr": None if error == 0 else _psnr(error),
+        "ssim": ssim(cover, stego) if structural else None,
+        "changed_channels": int(np.count_nonzero(cover != stego)),
+    }
+    report["chi_square"] = dict(zip(CHANNELS, chi_square(cover_counts, stego_counts).tolist()))
+    report["kl_divergence"] = dict(zip(CHANNELS, kl_divergence(cover_counts, stego_counts).tolist()))
+    return report
+
+
+def write_report(path, reports):
+    """
+    Write one report or a list of reports as JSON.
+    """
+    with open(path, "w") as output:
+        json.dump(reports, output, indent=2)
+
+
+def show_histograms(cover, stego, title="Stego image"):
+    """
+    Plot the channel histograms of a cover and its stego image side by side.
+
+    matplotlib is imported here, so headless use of this module never needs it.
+    """
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(1, 2, figsize=(12, 6), sharey=True)
+    for axis, pixels, name in ((axes[0], cover, "Original image"), (axes[1], stego, title)):
+        for counts, channel in zip(histograms(load_pixels(pixels)), CHANNELS):
+            axis.stairs(counts, np.arange(257), color=channel.lower(), label=channel)
+        axis.set_title(f"Histogram of {name}")
+        axis.set_xlabel("Pixel Intensity")
+        axis.legend()
+    axes[0].set_ylabel("Frequency")
+    figure.tight_layout()
+    plt.show()
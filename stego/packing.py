@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def as_payload(data):
+    """
+    View bytes, a bytearray or any uint8 array as a flat uint8 payload array.
+    """
+    if isinstance(data, np.ndarray):
+        return np.ascontiguousarray(data, dtype=np.uint8).reshape(-1)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def clip_widths(widths, total_bits, ends=None):
+    """
+    Trim a slot width sequence to the slots needed for ``total_bits`` payload bits.
+
+    The last slot is narrowed to the bits that remain, matching how the bit-string
+    embedder wrote a short final chunk into the low bits of its channel. If the slots
+    cannot hold the payload the full sequence is returned unchanged.
+
+    :param widths: Per-slot bit widths in embedding order
+    :param total_bits: Number of payload bits to place
+    :param ends: Precomputed cumulative sum of ``widths``, if available
+    :return: uint8 array of widths summing to at most ``total_bits``
+    """
+    widths = np.asarray(widths, dtype=np.uint8)
+    if total_bits <= 0:
+        return widths[:0]
+    if ends is None:
+        ends = np.cumsum(widths, dtype=np.int64)
+    count = int(np.searchsorted(ends, total_bits))
+    if count >= widths.size:
+        return widths
+    clipped = widths[:count + 1].copy()
+    clipped[-1] -= ends[count] - total_bits
+    return clipped
+
+
+def pack_symbols(data, widths, bit_offset=0):
+    """
+    Split a payload into variable-width symbols, most significant bit first.
+
+    :param data: Payload bytes or uint8 array
+    :param widths: Bit width of each symbol, at most 8; see ``clip_widths``
+    :param bit_offset: Payload bit at which the first symbol starts
+    :return: uint8 array with one symbol per width
+    """
+    widths = np.asarray(widths, dtype=np.uint8)
+    ends = np.cumsum(widths, dtype=np.int64)
+    total_bits = int(ends[-1]) if widths.size else 0
+
+    # Only unpack the bytes these symbols cover
+    first_byte = bit_offset // 8
+    bits = np.unpackbits(as_payload(data)[first_byte:(bit_offset + total_bits + 7) // 8])
+    offsets = ends - widths + bit_offset % 8
+    symbols = np.zeros(widths.size, dtype=np.uint8)
+    if widths.size == 0:
+        return symbols
+
+    for k in range(int(widths.max())):
+        active = np.flatnonzero(widths > k)
+        symbols[active] = (symbols[active] << 1) | bits[offsets[active] + k]
+    return symbols
+
+
+def unpack_symbols(symbols, widths):
+    """
+    Reassemble variable-width symbols into payload bytes; the inverse of ``pack_symbols``.
+
+    :param symbols: uint8 array of symbols
+    :param widths: Bit width of each symbol
+    :return: uint8 array of bytes, zero-padded to a whole byte
+    """
+    return np.packbits(symbol_bits(symbols, widths))
+
+
+def symbol_bits(symbols, widths):
+    """
+    Expand variable-width symbols into a flat array of 0/1 payload bits.
+    """
+    symbols = np.asarray(symbols, dtype=np.uint8)
+    widths = np.asarray(widths, dtype=np.uint8)
+    ends = np.cumsum(widths, dtype=np.int64)
+    total_bits = int(ends[-1]) if widths.size else 0
+    offsets = ends - widths
+    bits = np.zeros(total_bits, dtype=np.uint8)
+
+    for k in range(int(widths.max()) if widths.size else 0):
+        active = np.flatnonzero(widths > k)
+        shift = widths[active] - 1 - k
+        bits[offsets[active] + k] = (symbols[active] >> shift) & 1
+    return bits
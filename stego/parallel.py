@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+from .engine import build_slot_table, embed_symbols, extract_symbols, slot_masks
+from .packing import as_payload, clip_widths, pack_symbols, unpack_symbols
+
+STRIPES_PER_WORKER = 4  # Extra stripes even out the load between edge-heavy and flat regions
+
+
+def default_workers():
+    """
+    Number of CPU cores available to this process.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def plan_stripes(block_capacities, total_bits, stripes):
+    """
+    Split the block rows a payload covers into stripes with their starting bit offsets.
+
+    The bit offset of a stripe is the prefix sum of the capacities of all block rows
+    above it, so stripes can be embedded independently and still line up with the
+    serial block-raster order.
+
+    :param block_capacities: Bits per block, as from ``block_capacities``
+    :param total_bits: Payload bits to place
+    :param stripes: Desired number of stripes
+    :return: List of (first block row, end block row, first bit, end bit) per stripe
+    """
+    row_ends = np.cumsum(block_capacities.sum(axis=1))
+    rows = min(int(np.searchsorted(row_ends, total_bits)) + 1, len(row_ends))
+    bounds = np.linspace(0, rows, min(stripes, rows) + 1).astype(int)
+    offsets = np.concatenate([[0], row_ends])
+    return [(int(start), int(stop), int(offsets[start]), min(int(offsets[stop]), total_bits))
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def embed_parallel(engine, pixels, edge_map, payload, workers=None, executor="thread"):
+    """
+    Embed a payload stripe by stripe on a pool of workers.
+
+    The result is identical to ``StegoEngine.embed_payload``. With ``executor="process"``
+    the pixels are shared with the worker processes through shared memory. Progress is
+    reported, cancellation checked and ``slots_written`` counted as stripes complete.
+
+    :param engine: ``StegoEngine`` supplying the block configuration
+    :param pixels: C-contiguous HxWx3 uint8 array, modified in place
+    :param edge_map: Edge map of the cover before embedding
+    :param payload: Bytes or uint8 array to embed
+    :param workers: Pool size, defaults to the number of cores
+    :param executor: "thread" or "process"
+    """
+    payload = as_payload(payload)
+    height, width = pixels.shape[:2]
+    engine.check_capacity(edge_map, height, width, payload.size)
+    total_bits = payload.size * 8
+    workers = workers or default_workers()
+    plan = plan_stripes(engine.block_capacities(edge_map, height, width), total_bits, workers * STRIPES_PER_WORKER)
+
+    # Hand each stripe only its edge map rows and the payload bytes it covers
+    jobs = [(_config(engine), edge_map[start:stop], (height, width), start, end - offset, payload[offset // 8:(end + 7) // 8], offset % 8)
+            for start, stop, offset, end in plan]
+    _run(_embed_stripe, jobs, pixels, workers, executor, writeback=True, done=_reporter(engine, "embed", plan, total_bits, "slots_written"))
+
+
+def extract_parallel(engine, pixels, edge_map, length, workers=None, executor="thread"):
+    """
+    Extract ``length`` payload bytes stripe by stripe on a pool of workers.
+    """
+    height, width = pixels.shape[:2]
+    engine.check_capacity(edge_map, height, width, length)
+    total_bits = length * 8
+    workers = workers or default_workers()
+    plan = plan_stripes(engine.block_capacities(edge_map, height, width), total_bits, workers * STRIPES_PER_WORKER)
+
+    jobs = [(_config(engine), edge_map[start:stop], (height, width), start) for start, stop, _, _ in plan]
+    results = _run(_extract_stripe, jobs, pixels, workers, executor, writeback=False, done=_reporter(engine, "extract", plan, total_bits))
+
+    # Only the last stripe's final slot can have been narrowed at embedding time
+    widths = clip_widths(np.concatenate([widths for _, widths in results]), total_bits)
+    symbols = np.concatenate([symbols for symbols, _ in results])[:len(widths)]
+    engine.count("slots_read", len(widths))
+    return unpack_symbols(symbols & slot_masks(widths), widths)[:length]
+
+
+def _reporter(engine, stage, plan, total_bits, counter=None):
+    # Called in the calling thread as each stripe completes: progress, cancellation and counters
+    engine.checkpoint(stage, 0, total_bits)
+    progress = {"bits": 0}
+
+    def done(index, result):
+        first_bit, end_bit = plan[index][2:]
+        progress["bits"] += end_bit - first_bit
+        if counter is not None:
+            engine.count(counter, result)
+        engine.checkpoint(stage, progress["bits"], total_bits)
+
+    return done
+
+
+def _config(engine):
+    return engine.edge_bits, engine.non_edge_bits, engine.block_width, engine.block_height
+
+
+def _stripe_table(config, edge_rows, shape, start):
+    edge_bits, non_edge_bits, block_width, block_height = config
+    height, width = shape
+    return build_slot_table(edge_rows, height, width, edge_bits, non_edge_bits, block_width, block_height, first_row=start)
+
+
+def _embed_stripe(pixels, config, edge_rows, shape, start, stripe_bits, payload, bit_offset):
+    indices, widths = _stripe_table(config, edge_rows, shape, start)
+    widths = clip_widths(widths, stripe_bits)
+    embed_symbols(pixels, indices[:len(widths)], widths, pack_symbols(payload, widths, bit_offset))
+    return len(widths)
+
+
+def _extract_stripe(pixels, config, edge_rows, shape, start):
+    indices, widths = _stripe_table(config, edge_rows, shape, start)
+    return extract_symbols(pixels, indices, widths), widths
+
+
+def _run(function, jobs, pixels, workers, executor, writeback, done=None):
+    # Results in job order; ``done(index, result)`` runs in this thread as each job completes
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return _collect([pool.submit(function, pixels, *job) for job in jobs], done)
+    if executor != "process":
+        raise ValueError(f"Unknown executor {executor!r}, expected 'thread' or 'process'")
+
+    shared = shared_memory.SharedMemory(create=True, size=pixels.nbytes)
+    try:
+        np.ndarray(pixels.shape, dtype=np.uint8, buffer=shared.buf)[...] = pixels
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = _collect([pool.submit(_run_shared, function, shared.name, pixels.shape, job) for job in jobs], done)
+        if writeback:
+            pixels[...] = np.ndarray(pixels.shape, dtype=np.uint8, buffer=shared.buf)
+        return results
+    finally:
+        shared.close()
+        shared.unlink()
+
+
+def _collect(futures, done):
+    indices = {future: index for index, future in enumerate(futures)}
+    results = [None] * len(futures)
+    try:
+        for future in as_completed(futures):
+            index = indices[future]
+            results[index] = future.result()
+            if done is not None:
+                done(index, results[index])
+    except BaseException:
+        # Cancelled or failed: stripes that have not started are dropped
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+
+def _run_shared(function, name, shape, job):
+    shared = shared_memory.SharedMemory(name=name)
+    try:
+        return function(np.ndarray(shape, dtype=np.uint8, buffer=shared.buf), *job)
+    finally:
+        shared.close()
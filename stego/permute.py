@@ -0,0 +1,101 @@
+import hashlib
+
+import numpy as np
+
+FEISTEL_ROUNDS = 4  # Rounds of the balanced Feistel network; four give a pseudo-random permutation
+PERMUTE_BATCH = 1 << 16  # Payload positions mapped to slots per vectorized batch
+
+_MULTIPLIERS = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9))
+
+
+def round_keys(key, rounds=FEISTEL_ROUNDS):
+    """
+    Derive one 64-bit key per Feistel round from a secret string or bytes.
+    """
+    secret = key.encode("utf-8") if isinstance(key, str) else bytes(key)
+    digest = hashlib.blake2b(secret, digest_size=8 * rounds, person=b"stego-slots").digest()
+    return np.frombuffer(digest, dtype=">u8").astype(np.uint64)
+
+
+class SlotPermutation:
+    """
+    Keyed bijection of ``range(size)`` onto itself that is never stored as a table.
+
+    A balanced Feistel network permutes the smallest even number of bits covering
+    ``size``, and values that land outside the range are encrypted again until they
+    fall inside (cycle walking). As the bit domain is less than four times ``size``,
+    a position takes fewer than four walks on average, so mapping costs O(1) time and
+    memory per position.
+    """
+
+    def __init__(self, key, size, rounds=FEISTEL_ROUNDS):
+        """
+        :param key: Secret string or bytes
+        :param size: Number of positions to permute
+        :param rounds: Feistel rounds
+        """
+        self.size = size
+        self.half_bits = max((int(size - 1).bit_length() + 1) // 2, 1)
+        self.mask = np.uint64((1 << self.half_bits) - 1)
+        self.keys = round_keys(key, rounds)
+
+    def _round(self, right, key):
+        # splitmix64-style finalizer of the right half, truncated to a half
+        value = (right ^ key) * _MULTIPLIERS[0]
+        value ^= value >> np.uint64(29)
+        value *= _MULTIPLIERS[1]
+        value ^= value >> np.uint64(32)
+        return value & self.mask
+
+    def _encrypt(self, values):
+        shift = np.uint64(self.half_bits)
+        left = values >> shift
+        right = values & self.mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << shift) | right
+
+    def __call__(self, positions):
+        """
+        Slot of every payload position.
+
+        :param positions: Int or int array of positions in ``range(size)``
+        :return: int64 array (or int) of the same shape
+        """
+        scalar = np.isscalar(positions)
+        values = np.asarray(positions, dtype=np.uint64).reshape(-1)
+        if values.size and int(values.max()) >= self.size:
+            raise IndexError(f"Position outside a permutation of {self.size}")
+        with np.errstate(over="ignore"):
+            values = self._encrypt(values)
+            outside = np.flatnonzero(values >= self.size)
+            while outside.size:
+                values[outside] = self._encrypt(values[outside])
+                outside = outside[values[outside] >= self.size]
+        slots = values.astype(np.int64)
+        return int(slots[0]) if scalar else slots.reshape(np.shape(positions))
+
+    def batches(self, start=0, batch=PERMUTE_BATCH):
+        """
+        Yield the slots of positions ``start, start + 1, ...`` in arrays of ``batch``.
+        """
+        for first in range(start, self.size, batch):
+            yield self(np.arange(first, min(first + batch, self.size), dtype=np.uint64))
+
+
+def keyed_slot_batches(edge_map, height, width, edge_bits, non_edge_bits, block_width, block_height, key, batch=PERMUTE_BATCH):
+    """
+    Slots of an image in keyed pseudo-random order, one batch of channels at a time.
+
+    Every channel of the image is a position of the permutation; channels whose block
+    holds zero bits are left out of their batch.
+
+    :return: Iterator of (int64 indices into ``pixels.reshape(-1)``, uint8 widths)
+    """
+    block_widths = np.where(edge_map, np.uint8(edge_bits), np.uint8(non_edge_bits))
+    permutation = SlotPermutation(key, height * width * 3)
+    for channels in permutation.batches(batch=batch):
+        pixel_y, pixel_x = np.divmod(channels // 3, width)
+        widths = block_widths[pixel_y // block_height, pixel_x // block_width]
+        used = widths > 0
+        yield channels[used], widths[used]
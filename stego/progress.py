@@ -0,0 +1,32 @@
+import threading
+
+CHUNK_BLOCK_ROWS = 64  # Block rows processed between progress reports and cancellation checks
+
+
+class Cancelled(Exception):
+    """
+    Raised inside an embed or extract call once its ``CancelToken`` has been cancelled.
+    """
+
+
+class CancelToken:
+    """
+    Thread-safe flag another thread sets to stop a running job at its next chunk.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def cancel(self):
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def check(self):
+        """
+        :raises Cancelled: If the job has been cancelled
+        """
+        if self.event.is_set():
+            raise Cancelled("Job was cancelled")
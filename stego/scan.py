@@ -0,0 +1,184 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import os
+import time
+
+from PIL import Image
+import numpy as np
+
+from .engine import NUM_BITS, StegoEngine
+from .header import HEADER_SIZE, HeaderError
+from .images import load_pixels
+
+SCAN_EXTENSIONS = (".png", ".bmp", ".tif", ".tiff", ".webp", ".npy")  # Lossless formats a payload survives
+SCAN_BLOCK_ROWS = 32  # Block rows first decoded when non-edge blocks hold no bits, doubled until the header slots are covered
+SCAN_FIELDS = ["path", "status", "error", "seconds", "width", "height", "rows_decoded", "threshold", "edge_bits", "non_edge_bits", "block_width", "block_height", "stable_edges", "version", "payload_type", "codec", "ecc", "length"]
+
+
+def find_images(paths, extensions=SCAN_EXTENSIONS):
+    """
+    Expand files and directories (searched recursively) into image paths, in sorted order.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, directories, files in os.walk(path):
+            directories.sort()
+            for name in sorted(files):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(root, name)
+
+
+def header_rows(engine, height, width, block_rows=SCAN_BLOCK_ROWS):
+    """
+    Pixel rows from the top that hold the header of an image, lookahead row included.
+
+    Mirrors ``StegoEngine.edge_band``, so the blocks of the rows classify exactly as in
+    the full image. All rows are needed for keyed slot order. When non-edge blocks hold
+    no bits the header slots depend on the edges, so ``block_rows`` are decoded and
+    ``holds_header`` decides whether that was enough.
+    """
+    if engine.key is not None:
+        return height
+    min_bits = min(engine.edge_bits, engine.non_edge_bits)
+    if min_bits > 0:
+        rows = -(-HEADER_SIZE * NUM_BITS // (width * engine.block_height * 3 * min_bits))
+    else:
+        rows = block_rows
+    return min(rows * engine.block_height + 1, height)
+
+
+def holds_header(engine, pixels, height):
+    """
+    Whether the top rows decoded from an image ``height`` rows tall hold every header slot.
+
+    The last row of a partial decode is the lookahead row, so only the block rows above
+    it are counted.
+    """
+    if pixels.shape[0] >= height or min(engine.edge_bits, engine.non_edge_bits) > 0:
+        return True
+    rows = (pixels.shape[0] - 1) // engine.block_height
+    edge_map = engine.compute_edge_map(pixels)[:rows]
+    return int(engine.block_capacities(edge_map, rows * engine.block_height, pixels.shape[1]).sum()) >= HEADER_SIZE * NUM_BITS
+
+
+def read_top_rows(path, rows_for_size):
+    """
+    Decode only the top rows of an image file.
+
+    ``.npy`` files are memory-mapped and non-interlaced PNGs are decoded row by row
+    until enough rows are done; other formats are decoded in full and cropped. The PNG
+    shortcut relies on Pillow internals, so any failure there falls back to a full decode.
+
+    :param rows_for_size: Function of (height, width) giving the number of rows to read
+    :return: Tuple of (HxWx3 uint8 array of the top rows, full height, full width)
+    """
+    if path.lower().endswith(".npy"):
+        pixels = np.load(path, mmap_mode="r")
+        height, width = pixels.shape[:2]
+        return load_pixels(np.array(pixels[:rows_for_size(height, width)])), height, width
+
+    with Image.open(path) as image:
+        width, height = image.size
+        rows = rows_for_size(height, width)
+        if image.format != "PNG" or image.info.get("interlace") or len(image.tile) != 1 or rows >= height:
+            image.load()
+            return load_pixels(image)[:rows], height, width
+        try:
+            return _decode_png_rows(image, rows), height, width
+        except Exception:
+            pass  # The image object may be half decoded, so it is opened again below
+    return load_pixels(path)[:rows], height, width
+
+
+def _decode_png_rows(image, rows):
+    # The zlib decoder stops once the shortened image is filled
+    width = image.size[0]
+    image.tile = [image.tile[0]._replace(extents=(0, 0, width, rows))]
+    image._size = (width, rows)
+    image.load()
+    pixels = load_pixels(image)
+    if pixels.shape[:2] != (rows, width):
+        raise ValueError(f"Partial PNG decode gave {pixels.shape[:2]} instead of {(rows, width)}")
+    return pixels
+
+
+def scan_file(path, config=None):
+    """
+    Check whether an image carries a payload header, decoding as few rows as possible.
+
+    Only the header is read, so the payload checksum is not verified.
+
+    :param path: Image file path
+    :param config: Keyword arguments for ``StegoEngine``
+    :return: Result dict with the fields of ``SCAN_FIELDS``; status is "hit", "miss" or "error"
+    """
+    engine = StegoEngine(**(config or {}))
+    result = dict.fromkeys(SCAN_FIELDS)
+    result.update(path=path, threshold=engine.threshold, edge_bits=engine.edge_bits, non_edge_bits=engine.non_edge_bits,
+                  block_width=engine.block_width, block_height=engine.block_height, stable_edges=engine.stable_edges)
+    start = time.perf_counter()
+    try:
+        block_rows = SCAN_BLOCK_ROWS
+        while True:
+            pixels, height, width = read_top_rows(path, lambda height, width: header_rows(engine, height, width, block_rows))
+            if holds_header(engine, pixels, height):
+                break
+            block_rows *= 2
+        result.update(width=width, height=height, rows_decoded=pixels.shape[0])
+        header = engine.read_header(pixels)
+        result.update(status="hit", **{field: header[field] for field in ("version", "payload_type", "codec", "ecc", "length")})
+    except HeaderError:
+        result["status"] = "miss"
+    except Exception as error:
+        result.update(status="error", error=f"{type(error).__name__}: {error}")
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def scan_paths(paths, config=None, workers=None, max_in_flight=None):
+    """
+    Scan image files for payload headers on a process pool.
+
+    :param paths: Iterable of image paths
+    :param config: Keyword arguments for ``StegoEngine``
+    :param workers: Worker processes, defaults to the number of cores
+    :param max_in_flight: Submitted but unfinished files, defaults to four times ``workers``
+    :return: Iterator of result dicts from ``scan_file`` in completion order
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 4 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for path in paths:
+            pending.add(pool.submit(scan_file, path, config))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+
+def main(args):
+    """
+    Entry point of ``python -m stego scan``.
+    """
+    from .batch import write_results
+    config = {
+        "threshold": args.threshold,
+        "edge_bits": args.edge_bits,
+        "non_edge_bits": args.non_edge_bits,
+        "block_width": args.block_width,
+        "block_height": args.block_height,
+        "stable_edges": args.stable_edges,
+        "key": args.key,
+    }
+    results = sorted(scan_paths(find_images(args.paths), config, args.workers), key=lambda result: result["path"])
+    write_results(args.results, results, SCAN_FIELDS)
+
+    hits = sum(result["status"] == "hit" for result in results)
+    errors = sum(result["status"] == "error" for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    print(f"{hits} of {len(results)} images carry a payload header ({errors} errors, {seconds:.3f} s of scanning), results written to {args.results}")
+    return 1 if errors else 0
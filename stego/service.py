@@ -0,0 +1,382 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+import json
+import math
+import multiprocessing
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .batch import PAYLOAD_KINDS
+from .codecs import CODEC_NAMES, decode_payload, encode_bytes, encode_image
+from .ecc import ecc_scheme
+from .engine import StegoEngine, capacity_report
+from .header import PAYLOAD_IMAGE, PAYLOAD_TEXT
+from .images import decode_pixels, encode_pixels
+from .parallel import default_workers
+
+QUEUE_LIMIT = 16  # Admitted requests waiting for a worker, beyond those running
+REQUEST_TIMEOUT = 30.0  # Seconds for reading a request and for its CPU work each
+MAX_BODY_BYTES = 64 * 1024 * 1024  # Larger uploads are refused before they are read
+MAX_HEADER_BYTES = 64 * 1024
+ENDPOINTS = ("/embed", "/extract", "/capacity", "/metrics")
+ENGINE_PARAMS = {"threshold": float, "edge_bits": int, "non_edge_bits": int, "block_width": int, "block_height": int, "stable_edges": lambda value: value.lower() in ("1", "true", "yes"), "key": str, "ecc": ecc_scheme}
+ENGINE_LIMITS = {"edge_bits": (1, 8), "non_edge_bits": (0, 8), "block_width": (1, None), "block_height": (1, None)}  # Inclusive ranges
+CONTENT_TYPES = {PAYLOAD_TEXT: "text/plain; charset=utf-8", PAYLOAD_IMAGE: "image/png"}
+
+
+class RequestError(Exception):
+    """
+    A request that is answered with an HTTP error status and a JSON message.
+    """
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def embed_job(config, cover, payload, kind, save_options):
+    """
+    Embed ``payload`` with a header into the encoded ``cover``; runs in a worker process.
+
+    :return: Tuple of (encoded stego image, info dict)
+    """
+    engine = StegoEngine(**config)
+    pixels = decode_pixels(cover)
+    hidden_width = hidden_height = 0
+    if kind == "image":
+        hidden = decode_pixels(payload)
+        hidden_height, hidden_width = hidden.shape[:2]
+        codec, encoded = encode_image(hidden)
+    else:
+        codec, encoded = encode_bytes(payload)
+    engine.embed_with_header(pixels, engine.compute_edge_map(pixels), PAYLOAD_KINDS[kind], encoded, hidden_width, hidden_height, codec)
+    return encode_pixels(pixels, **save_options), {"codec": CODEC_NAMES[codec], "encoded_bytes": len(encoded)}
+
+
+def extract_job(config, stego):
+    """
+    Extract the payload embedded with a header in the encoded ``stego`` image; runs in a worker process.
+
+    :return: Tuple of (content type, payload bytes, info dict); hidden images come back as PNG
+    """
+    engine = StegoEngine(**config)
+    header, encoded = engine.extract_with_header(decode_pixels(stego))
+    payload = decode_payload(header["codec"], encoded)
+    if header["payload_type"] == PAYLOAD_IMAGE:
+        payload = encode_pixels(np.frombuffer(payload, dtype=np.uint8).reshape(header["height"], header["width"], 3))
+    content_type = CONTENT_TYPES.get(header["payload_type"], "application/octet-stream")
+    info = {"codec": CODEC_NAMES[header["codec"]], "payload_type": header["payload_type"]}
+    if header["ecc"]:
+        info.update(corrected=header["corrected"], uncorrectable=header["uncorrectable"])
+    return content_type, payload, info
+
+
+def capacity_job(config, cover):
+    """
+    Capacity report of the encoded ``cover``; runs in a worker process.
+    """
+    engine = StegoEngine(**config)
+    pixels = decode_pixels(cover)
+    height, width = pixels.shape[:2]
+    return capacity_report(engine.compute_edge_map(pixels), height, width, engine.edge_bits, engine.non_edge_bits, engine.block_width, engine.block_height)
+
+
+class StegoService:
+    """
+    Asyncio HTTP front end dispatching embed, extract and capacity work to a process pool.
+
+    At most ``workers`` jobs run at once and at most ``queue_limit`` more wait for a
+    worker; further requests are refused with 503 before their body is read. A job
+    that times out is answered with 504 but keeps its place until its worker finishes,
+    so timed-out work cannot pile up behind the limit.
+
+    Endpoints, all answering with ``Connection: close``:
+
+    * ``POST /embed``: multipart form with ``cover`` and ``payload`` files and an optional
+      ``kind`` field (bytes, text or image); returns the stego PNG
+    * ``POST /extract``: stego image as the body; returns the payload
+    * ``POST /capacity``: cover image as the body; returns the capacity report as JSON
+    * ``GET /metrics``: request, queue and latency counters as JSON
+
+    Engine settings such as ``threshold`` or ``edge_bits`` may be given as query parameters;
+    values outside ``ENGINE_LIMITS`` are refused with 400.
+    """
+
+    def __init__(self, config=None, workers=None, queue_limit=QUEUE_LIMIT, timeout=REQUEST_TIMEOUT, max_body=MAX_BODY_BYTES, save_options=None):
+        self.config = config or {}
+        self.workers = workers or default_workers()
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.max_body = max_body
+        self.save_options = save_options or {}
+        self.pool = None
+        self.pending = 0  # Admitted jobs that have not finished in the pool
+        self.stats = {"requests": 0, "completed": 0, "rejected": 0, "timeouts": 0, "errors": 0, "peak_pending": 0}
+        self.latency = {}  # Endpoint -> (requests, total seconds, max seconds)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        """
+        Start the process pool and listen on ``host``:``port``; port 0 picks a free port.
+
+        :return: The ``asyncio.Server``
+        """
+        # Workers come from a fresh process, so they never inherit the listening or client sockets
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self):
+        """
+        Shut the process pool down, abandoning queued jobs.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def metrics(self):
+        """
+        Snapshot of request counters, queue occupancy and per-endpoint latency.
+        """
+        running = min(self.pending, self.workers)
+        latency = {endpoint: {"requests": count, "mean_seconds": total / count, "max_seconds": peak} for endpoint, (count, total, peak) in self.latency.items()}
+        return dict(self.stats, pending=self.pending, running=running, queued=self.pending - running, workers=self.workers, queue_limit=self.queue_limit, latency=latency)
+
+    async def handle(self, reader, writer):
+        start = time.perf_counter()
+        endpoint = None
+        try:
+            method, target, headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+            url = urlsplit(target)
+            endpoint = url.path
+            self.stats["requests"] += 1
+            status, content_type, body, extra = await self.route(method, url, headers, reader)
+            self.stats["completed"] += 1
+        except RequestError as error:
+            status, content_type, body, extra = error.status, "application/json", _json({"error": str(error)}), error.headers
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            status, content_type, body, extra = HTTPStatus.GATEWAY_TIMEOUT, "application/json", _json({"error": "Request timed out"}), {}
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+        except Exception as error:
+            self.stats["errors"] += 1
+            status, content_type, body, extra = HTTPStatus.INTERNAL_SERVER_ERROR, "application/json", _json({"error": f"{type(error).__name__}: {error}"}), {}
+
+        if endpoint in ENDPOINTS:
+            count, total, peak = self.latency.get(endpoint, (0, 0.0, 0.0))
+            seconds = time.perf_counter() - start
+            self.latency[endpoint] = (count + 1, total + seconds, max(peak, seconds))
+        try:
+            await _write_response(writer, status, content_type, body, extra)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, url, headers, reader):
+        """
+        Dispatch one request.
+
+        :return: Tuple of (status, content type, body bytes, extra headers)
+        """
+        if url.path == "/metrics":
+            _require_method(method, "GET")
+            return HTTPStatus.OK, "application/json", _json(self.metrics()), {}
+        if url.path not in ("/embed", "/extract", "/capacity"):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown endpoint {url.path}")
+        _require_method(method, "POST")
+        config = self.engine_config(url.query)
+
+        # Refuse before reading the body so that overload cannot exhaust memory
+        if self.pending >= self.workers + self.queue_limit:
+            self.stats["rejected"] += 1
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "Server is at capacity, retry later", {"Retry-After": "1"})
+        length = _content_length(headers, self.max_body)
+        self.pending += 1
+        self.stats["peak_pending"] = max(self.stats["peak_pending"], self.pending)
+        submitted = False
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.timeout)
+            if url.path == "/embed":
+                fields = _multipart(headers.get("content-type", ""), body)
+                if "cover" not in fields or "payload" not in fields:
+                    raise RequestError(HTTPStatus.BAD_REQUEST, "Embed needs cover and payload form fields")
+                kind = fields.get("kind", b"bytes").decode()
+                if kind not in PAYLOAD_KINDS:
+                    raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown payload kind {kind!r}")
+                future = self.submit(embed_job, config, fields["cover"], fields["payload"], kind, self.save_options)
+            elif url.path == "/extract":
+                future = self.submit(extract_job, config, body)
+            else:
+                future = self.submit(capacity_job, config, body)
+            submitted = True
+            result = await self.wait(future)
+        finally:
+            if not submitted:
+                self.pending -= 1
+
+        if url.path == "/embed":
+            image, info = result
+            return HTTPStatus.OK, "image/png", image, {"X-Codec": info["codec"], "X-Encoded-Bytes": str(info["encoded_bytes"])}
+        if url.path == "/extract":
+            content_type, payload, info = result
+            headers = {"X-Codec": info["codec"], "X-Payload-Type": str(info["payload_type"])}
+            if "corrected" in info:
+                headers.update({"X-ECC-Corrected": str(info["corrected"]), "X-ECC-Uncorrectable": str(info["uncorrectable"])})
+            return HTTPStatus.OK, content_type, payload, headers
+        return HTTPStatus.OK, "application/json", _json(result), {}
+
+    def submit(self, function, *args):
+        """
+        Run ``function`` in the pool; its admission slot is released when the worker finishes.
+        """
+        future = asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        self.pending -= 1
+
+    async def wait(self, future):
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise  # A subclass of OSError since Python 3.11
+        except BrokenProcessPool:
+            raise RequestError(HTTPStatus.INTERNAL_SERVER_ERROR, "Worker process died")
+        except ValueError as error:
+            # CapacityError, HeaderError and CodecError
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, f"{type(error).__name__}: {error}")
+        except OSError as error:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Unreadable image: {error}")
+
+    def engine_config(self, query):
+        """
+        Engine settings of the service overridden by query parameters.
+        """
+        config = dict(self.config)
+        for name, values in parse_qs(query).items():
+            if name not in ENGINE_PARAMS:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown parameter {name!r}")
+            try:
+                config[name] = ENGINE_PARAMS[name](values[-1])
+            except ValueError:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid value for {name}: {values[-1]!r}")
+        _check_engine_config(config)
+        return config
+
+
+def _check_engine_config(config):
+    for name, (low, high) in ENGINE_LIMITS.items():
+        if name in config and not (low <= config[name] and (high is None or config[name] <= high)):
+            limit = f"at least {low}" if high is None else f"between {low} and {high}"
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"{name} must be {limit}, got {config[name]}")
+    if "threshold" in config and not math.isfinite(config["threshold"]):
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"threshold must be a finite number, got {config['threshold']}")
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+async def _read_head(reader):
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            raise ConnectionResetError("Client closed the connection")
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed request")
+    return method.upper(), target, headers
+
+
+def _require_method(method, expected):
+    if method != expected:
+        raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use {expected}", {"Allow": expected})
+
+
+def _content_length(headers, max_body):
+    if "content-length" not in headers:
+        raise RequestError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is required")
+    try:
+        length = int(headers["content-length"])
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > max_body:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body exceeds {max_body} bytes")
+    return length
+
+
+def _multipart(content_type, body):
+    if not content_type.startswith("multipart/form-data"):
+        raise RequestError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "Embed expects multipart/form-data")
+    message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True) for part in message.iter_parts()}
+
+
+def _json(value):
+    return json.dumps(value).encode()
+
+
+async def _write_response(writer, status, content_type, body, headers):
+    status = HTTPStatus(status)
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host, port, **options):
+    """
+    Run a ``StegoService`` until cancelled.
+
+    :param options: Keyword arguments for ``StegoService``
+    """
+    service = StegoService(**options)
+    server = await service.start(host, port)
+    print(f"Serving on {', '.join(str(socket.getsockname()) for socket in server.sockets)}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(args):
+    """
+    Entry point of ``python -m stego serve``.
+    """
+    config = {
+        "threshold": args.threshold,
+        "edge_bits": args.edge_bits,
+        "non_edge_bits": args.non_edge_bits,
+        "block_width": args.block_width,
+        "block_height": args.block_height,
+        "stable_edges": args.stable_edges,
+        "key": args.key,
+        "ecc": args.ecc,
+    }
+    save_options = {"compress_level": args.compress_level, "strategy": args.png_strategy, "optimize": args.optimize}
+    queue_limit = QUEUE_LIMIT if args.queue_limit is None else args.queue_limit
+    timeout = REQUEST_TIMEOUT if args.timeout is None else args.timeout
+    max_body = MAX_BODY_BYTES if args.max_body is None else args.max_body
+    try:
+        asyncio.run(serve(args.host, args.port, config=config, workers=args.workers, queue_limit=queue_limit, timeout=timeout, max_body=max_body, save_options=save_options))
+    except KeyboardInterrupt:
+        pass
+    return 0
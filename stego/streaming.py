@@ -0,0 +1,188 @@
+import zlib
+
+import numpy as np
+
+from .engine import NUM_BITS, CapacityError, embed_symbols, extract_symbols
+from .header import HEADER_SIZE, PAYLOAD_BYTES, HeaderError, pack_header_values
+from .images import as_cover
+from .packing import clip_widths, pack_symbols, symbol_bits
+from .tiled import BAND_BLOCK_ROWS
+
+_END = object()  # Returned by chunk readers at the end of the stream
+
+
+def chunk_reader(source):
+    """
+    Uniform ``read(size)`` over a binary file-like object or an iterable of byte chunks.
+
+    The returned function only comes back short at the end of the stream, even for
+    pipes and sockets whose ``read`` may return fewer bytes than asked for. A file-like
+    source ends at an empty ``read``; an iterable ends when it is exhausted, and empty
+    chunks it yields are skipped.
+    """
+    if hasattr(source, "read"):
+        read_some = lambda size: source.read(size) or _END
+    else:
+        chunks = iter(source)
+        read_some = lambda size: next(chunks, _END)
+
+    pending = bytearray()
+
+    def read(size):
+        while len(pending) < size:
+            chunk = read_some(size - len(pending))
+            if chunk is _END:
+                break
+            pending.extend(chunk)
+        data = bytes(pending[:size])
+        del pending[:size]
+        return data
+
+    return read
+
+
+def iter_band_slots(engine, pixels, band_rows=BAND_BLOCK_ROWS):
+    """
+    Slot tables of an image one band of block rows at a time, classified in place.
+
+    :return: Iterator of (first pixel row, band height, indices, widths); indices are
+        relative to the first pixel of the band
+    """
+    height = pixels.shape[0]
+    step = engine.block_height * band_rows
+    for y in range(0, height, step):
+        band_height = min(step, height - y)
+        indices, widths = engine.band_slot_table(pixels[y:y + band_height + 1], band_height)
+        yield y, band_height, indices, widths
+
+
+def embed_stream(engine, pixels, source, payload_type=PAYLOAD_BYTES, band_rows=BAND_BLOCK_ROWS):
+    """
+    Embed a header and a payload of unknown length read from ``source`` on demand.
+
+    Each band pulls only the payload bytes its slots hold, so memory stays at one band
+    of slots and payload whatever the payload size. The header slots are reserved up
+    front and written last, once the length and checksum of the stream are known. The
+    result is identical to ``StegoEngine.embed_with_header`` with the whole payload.
+
+    :param engine: ``StegoEngine`` supplying the block configuration
+    :param pixels: C-contiguous, writable HxWx3 uint8 array, modified in place
+    :param source: Binary file-like object or iterable of byte chunks
+    :param payload_type: ``PAYLOAD_*`` type recorded in the header
+    :param band_rows: Block rows per band
+    :return: Number of payload bytes embedded
+    :raises CapacityError: If the stream outlasts the cover; ``pixels`` then holds a partial payload
+    :raises ValueError: If the engine has an ECC scheme, which needs the whole payload
+    """
+    if engine.ecc:
+        raise ValueError("ECC needs the whole payload; use embed_with_header")
+    pixels = as_cover(pixels, in_place=True)
+    read = chunk_reader(source)
+    row_stride = pixels.shape[1] * 3
+    header_bits = HEADER_SIZE * NUM_BITS
+
+    data = np.zeros(HEADER_SIZE, dtype=np.uint8)  # Placeholder header, embedded again at the end
+    bit_offset = 0  # Bit of ``data`` where the next slot starts
+    written = 0  # Bits embedded so far, header included
+    length = crc = 0
+    first_byte = b""  # Shares the last header slot with the header
+    exhausted = False
+    header_indices, header_widths = [], []
+
+    for y, band_height, indices, widths in iter_band_slots(engine, pixels, band_rows):
+        if exhausted and data.size * NUM_BITS == bit_offset:
+            break
+        capacity = int(widths.sum(dtype=np.int64))
+        needed = -(-(bit_offset + capacity) // NUM_BITS) - data.size
+        if needed > 0 and not exhausted:
+            chunk = read(needed)
+            exhausted = len(chunk) < needed
+            if chunk:
+                first_byte = first_byte or chunk[:1]
+                length += len(chunk)
+                crc = zlib.crc32(chunk, crc)
+                data = np.concatenate([data, np.frombuffer(chunk, dtype=np.uint8)])
+
+        widths = clip_widths(widths, data.size * NUM_BITS - bit_offset)
+        indices = indices[:len(widths)]
+        embed_symbols(pixels[y:y + band_height], indices, widths, pack_symbols(data, widths, bit_offset))
+        if written < header_bits:
+            count = len(clip_widths(widths, header_bits - written))
+            header_indices.append(indices[:count] + y * row_stride)
+            header_widths.append(widths[:count])
+
+        used = bit_offset + int(widths.sum(dtype=np.int64))
+        written += used - bit_offset
+        engine.count("slots_written", len(widths))
+        data = data[used // NUM_BITS:]
+        bit_offset = used % NUM_BITS
+
+    if data.size * NUM_BITS > bit_offset or (not exhausted and read(1)):
+        raise CapacityError(f"Payload stream does not fit into the {written} bits the cover holds")
+
+    # Every header slot ends within the first payload byte, so header + that byte fills them
+    widths = np.concatenate(header_widths)
+    prefix = pack_header_values(payload_type, length, crc) + first_byte
+    embed_symbols(pixels, np.concatenate(header_indices), widths, pack_symbols(np.frombuffer(prefix, dtype=np.uint8), widths))
+    engine.count("payload_bytes_embedded", HEADER_SIZE + length)
+    return length
+
+
+def iter_payload(engine, pixels, header, band_rows=BAND_BLOCK_ROWS):
+    """
+    Yield the payload described by ``header`` in chunks of about one band as it is decoded.
+
+    The checksum is verified once the last chunk has been yielded.
+
+    :param header: Header dict from ``StegoEngine.read_header``
+    :raises HeaderError: If the image ends early, the payload fails its checksum or carries ECC
+    """
+    if header["ecc"]:
+        raise HeaderError("Payloads with ECC cannot be streamed; use extract_with_header")
+    total_bits = (HEADER_SIZE + header["length"]) * NUM_BITS
+    skip = HEADER_SIZE * NUM_BITS
+    collected = crc = 0
+    carry = np.zeros(0, dtype=np.uint8)
+
+    for y, band_height, indices, widths in iter_band_slots(engine, pixels, band_rows):
+        if collected >= total_bits:
+            break
+        widths = clip_widths(widths, total_bits - collected)
+        indices = indices[:len(widths)]
+        bits = symbol_bits(extract_symbols(pixels[y:y + band_height], indices, widths), widths)
+        collected += bits.size
+        engine.count("slots_read", len(widths))
+
+        dropped = min(skip, bits.size)
+        skip -= dropped
+        bits = np.concatenate([carry, bits[dropped:]])
+        whole = bits.size - bits.size % NUM_BITS
+        carry = bits[whole:]
+        if whole:
+            chunk = np.packbits(bits[:whole]).tobytes()
+            crc = zlib.crc32(chunk, crc)
+            engine.count("payload_bytes_extracted", len(chunk))
+            yield chunk
+
+    if collected < total_bits:
+        raise HeaderError("Header length exceeds the capacity of the image")
+    if crc != header["crc32"]:
+        raise HeaderError("Embedded payload failed its checksum")
+
+
+def extract_stream(engine, pixels, writable, payload_type=None, band_rows=BAND_BLOCK_ROWS):
+    """
+    Write a payload embedded with a header to ``writable`` one band at a time.
+
+    :param writable: Object with a ``write`` method taking bytes
+    :param payload_type: Expected ``PAYLOAD_*`` type, or None to accept any
+    :return: The header dict
+    :raises HeaderError: If the header is missing, of another type, or the checksum fails
+        after the payload was written
+    """
+    header = engine.read_header(pixels)
+    if payload_type is not None and header["payload_type"] != payload_type:
+        raise HeaderError(f"Embedded payload has type {header['payload_type']}, expected {payload_type}")
+    for chunk in iter_payload(engine, pixels, header, band_rows):
+        writable.write(chunk)
+    return header
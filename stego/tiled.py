@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+BAND_BLOCK_ROWS = 64  # Block rows read from disk per band
+
+
+def open_cover(path, shape=None):
+    """
+    Memory-map a cover image without reading its pixels.
+
+    ``.npy`` files are mapped with ``np.load``, uncompressed TIFFs through the optional
+    ``tifffile`` package, and anything else as raw interleaved RGB bytes of ``shape``.
+
+    :param path: Path to the cover
+    :param shape: (height, width, 3) for raw files
+    :return: Read-only HxWx3 uint8 array backed by the file
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        pixels = np.load(path, mmap_mode="r")
+    elif extension in (".tif", ".tiff"):
+        pixels = _tifffile().memmap(path, mode="r")
+    else:
+        if shape is None:
+            raise ValueError("Raw covers need their (height, width, 3) shape")
+        pixels = np.memmap(path, dtype=np.uint8, mode="r", shape=tuple(shape))
+
+    if pixels.dtype != np.uint8 or pixels.ndim != 3 or pixels.shape[2] != 3:
+        raise ValueError(f"Expected an HxWx3 uint8 cover, got {pixels.dtype} {pixels.shape}")
+    return pixels
+
+
+def create_output(path, shape):
+    """
+    Create a writable memory-mapped HxWx3 uint8 image in the format implied by ``path``.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=tuple(shape))
+    if extension in (".tif", ".tiff"):
+        return _tifffile().memmap(path, shape=tuple(shape), dtype=np.uint8, photometric="rgb")
+    return np.memmap(path, dtype=np.uint8, mode="w+", shape=tuple(shape))
+
+
+def iter_bands(pixels, block_height, band_rows=BAND_BLOCK_ROWS):
+    """
+    Walk an image in bands of whole block rows, loading one band into memory at a time.
+
+    Each band carries one extra pixel row below it when the image has one, which edge
+    detection needs for the vertical gradient of the band's last block row.
+
+    :param pixels: HxWx3 array, typically memory-mapped
+    :param block_height: Height of the block
+    :param band_rows: Block rows per band
+    :return: Iterator of (first pixel row, band height, band array including lookahead)
+    """
+    height = pixels.shape[0]
+    step = block_height * band_rows
+    for y in range(0, height, step):
+        band_height = min(step, height - y)
+        yield y, band_height, np.array(pixels[y:min(y + band_height + 1, height)])
+
+
+def _tifffile():
+    try:
+        import tifffile
+    except ImportError:
+        raise ImportError("Streaming TIFF covers requires the 'tifffile' package") from None
+    return tifffile
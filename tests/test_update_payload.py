@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from stego import PAYLOAD_BYTES, StegoEngine
+
+
+def _cover():
+    return np.random.default_rng(0).integers(0, 256, (60, 60, 3), dtype=np.uint8)
+
+
+def test_update_payload_rejects_legacy_edges():
+    engine = StegoEngine()
+    pixels = _cover()
+    engine.embed_with_header(pixels, engine.compute_edge_map(pixels), PAYLOAD_BYTES, b"old payload")
+    before = pixels.copy()
+    with pytest.raises(ValueError, match="stable_edges"):
+        engine.update_payload(pixels, PAYLOAD_BYTES, b"new payload")
+    assert np.array_equal(pixels, before)
+
+
+def test_update_payload_with_stable_edges():
+    engine = StegoEngine(stable_edges=True)
+    pixels = _cover()
+    engine.embed_with_header(pixels, engine.compute_edge_map(pixels), PAYLOAD_BYTES, b"old payload")
+    report = engine.update_payload(pixels, PAYLOAD_BYTES, b"new payload")
+    assert report["slots_written"] < report["slots_compared"]
+    assert engine.extract_with_header(pixels)[1].tobytes() == b"new payload"